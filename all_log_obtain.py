@@ -1,27 +1,139 @@
 import sys
 import re
-import urllib.request
-import ssl
 import schedule
 from duplicate_removal import duplicate_removal
+from browser_pool import BrowserPool
+from log_downloader import DownloadStats, default_pool, format_rate, stream_to_file
+from log_cache import LogCache, file_sha256, log_uuid
+from crawl_state import CrawlState
+from index_extractor import extract_error_projects
+from log_store import check_compression, compress_file, compression_of
+from blob_store import BlobStore
+from retry_policy import RetryBudget, RetryPolicy
+from run_log import RunLogWriter
+from events import emit_event, start_event_log, stop_event_log, timed_phase
+from metrics import RunMetrics
+from snapshot_archive import SNAPSHOT_DIR, SnapshotArchive, print_diff
+from status_feed import STATUS_FEED_URL, StatusFeedError, failing_projects, load_status_feed
+from readiness import (current_log_href, wait_for_index_page, wait_for_log_link,
+                       wait_for_project_page)
 from typing import List
 from bs4 import BeautifulSoup
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException
 import time
 import os
+import threading
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+
+
+# OSS-Fuzz 构建状态首页与日志所在的 bucket
+LOG_HOST_URL = "https://oss-fuzz-build-logs.storage.googleapis.com"
+INDEX_URL = LOG_HOST_URL + "/index.html"
+
+# 点击按钮后获取日志链接的方式："targeted" 直接查询 shadowRoot，"soup" 解析展平后的整页 HTML
+LOG_LINK_EXTRACTION = "targeted"
+
+# 单个项目同时进行的日志下载数量
+DOWNLOAD_WORKERS = 4
+
+# 重试策略：下载与页面加载共用一次运行内的重试预算，每次运行开始时重置
+RETRY_BUDGET_PER_RUN = 200
+RETRY_BUDGET = RetryBudget(RETRY_BUDGET_PER_RUN)
+DOWNLOAD_RETRY = RetryPolicy(max_attempts=4, base_delay=1.0, max_delay=30.0, budget=RETRY_BUDGET)
+PAGE_RETRY = RetryPolicy(max_attempts=3, base_delay=2.0, max_delay=30.0, budget=RETRY_BUDGET,
+                         retryable=(WebDriverException,))
+
+# 下载的日志保存目录：./build_error_log_of_projects/项目名
+LOG_DIR = "build_error_log_of_projects"
+# 日志保存方式：None 按原文保存，"gzip" / "zstd" 压缩保存（读取见 log_store.open_log）
+LOG_COMPRESSION = None
+
+# 增量抓取状态文件
+CRAWL_STATE_PATH = "crawl_state.json"
+
+# 多个工作线程会同时追加 target/wrong 列表文件，用一把锁保证每行完整写入
+_list_file_lock = threading.Lock()
+
+
+def append_line(path, line):
+    """线程安全地向列表文件追加一行"""
+    with _list_file_lock:
+        with open(path, "a", encoding="utf-8") as fi:
+            fi.write(line + "\n")
+
+
+_log_cache = None
+_crawl_state = None
+_snapshot_archive = None
+_blob_store = None
+_log_cache_lock = threading.Lock()
+
+
+def get_log_cache():
+    """进程内共享的日志缓存索引，首次使用时从磁盘加载"""
+    global _log_cache
+    with _log_cache_lock:
+        if _log_cache is None:
+            _log_cache = LogCache(LOG_DIR)
+        return _log_cache
+
+
+def get_crawl_state():
+    """进程内共享的增量抓取状态，首次使用时从磁盘加载"""
+    global _crawl_state
+    with _log_cache_lock:
+        if _crawl_state is None:
+            _crawl_state = CrawlState(CRAWL_STATE_PATH)
+        return _crawl_state
+
+
+def get_blob_store():
+    """进程内共享的日志内容去重存储"""
+    global _blob_store
+    with _log_cache_lock:
+        if _blob_store is None:
+            _blob_store = BlobStore(LOG_DIR)
+        return _blob_store
+
+
+def get_snapshot_archive():
+    """进程内共享的首页快照存档"""
+    global _snapshot_archive
+    with _log_cache_lock:
+        if _snapshot_archive is None:
+            _snapshot_archive = SnapshotArchive(SNAPSHOT_DIR)
+        return _snapshot_archive
+
+
+def use_site(base_url):
+    """
+    把首页与日志地址指向另一个站点（如 mock_build_status_site.py 启动的本地模拟站点），
+    需在开始抓取前调用
+    """
+    global LOG_HOST_URL, INDEX_URL
+    LOG_HOST_URL = base_url.rstrip("/")
+    INDEX_URL = LOG_HOST_URL + "/index.html"
+
+
+def project_name_from_url(url):
+    """从 index.html#项目名 形式的URL中取出项目名"""
+    return url.split("#")[-1] if "#" in url else "unknown_project"
 
 
 class Tee:
-    """同时输出到控制台和文件的类"""
+    """
+    同时输出到控制台和文件的类
+    文件由 RunLogWriter 在后台线程中批量写入（定时或缓冲区满时落盘，超过大小上限时轮转），
+    print 不再每次都触发一次文件 flush
+    """
 
-    def __init__(self, filename):
-        self.file = open(filename, 'w', encoding='utf-8')
+    def __init__(self, filename, **writer_options):
+        self.file = RunLogWriter(filename, **writer_options)
         self.stdout = sys.stdout
         self.stderr = sys.stderr
         sys.stdout = self
@@ -30,20 +142,19 @@ class Tee:
     def write(self, message):
         # 输出到控制台
         self.stdout.write(message)
-        # 写入文件
+        # 放入运行日志缓冲区，由后台线程写盘
         self.file.write(message)
-        # 立即刷新缓冲区
-        self.file.flush()
 
     def flush(self):
         self.stdout.flush()
+        # 只通知后台线程尽快写盘，不在调用方线程等待磁盘 IO
         self.file.flush()
 
     def close(self):
         # 恢复原始输出流
         sys.stdout = self.stdout
         sys.stderr = self.stderr
-        # 关闭文件
+        # 写完缓冲区并关闭文件
         self.file.close()
 
     def __enter__(self):
@@ -53,62 +164,81 @@ class Tee:
         self.close()
 
 
-def expand_shadow_dom(driver):
-    """递归展开页面中的所有Shadow DOM"""
-    driver.execute_script("""
-        function expandShadowRoots(root) {
-            root.querySelectorAll('*').forEach(el => {
-                if (el.shadowRoot) {
-                    const container = document.createElement('div');
-                    container.className = '__shadow_contents';
-                    container.innerHTML = el.shadowRoot.innerHTML;
-                    el.appendChild(container);
-                    expandShadowRoots(container);
-                    }
-                });
-        }
-        // 从 document.body 开始
-        expandShadowRoots(document.body);
-    """)
-    print("🔍 Shadow DOM已展平")
-
+# Shadow DOM 展平引擎：把 shadowRoot.innerHTML 复制到宿主元素下的 div.__shadow_contents 中，
+# 使 page_source 能看到组件内部内容。已展开的宿主会打上标记，重复调用只展开新出现的 shadowRoot
+FLATTEN_JS = """
+    const selectors = arguments[0];
+    const maxNodes = arguments[1];
+    const maxChars = arguments[2];
+    const maxDepth = arguments[3];
+    const stats = {roots: 0, nodes: 0, chars: 0, truncated: false};
 
-def expand_shadow_dom_with_timeout(driver, timeout=3):
-    """递归展开页面中的所有Shadow DOM，但最多执行指定秒数"""
-    start_time = time.time()
+    function allowed(el) {
+        return !selectors || selectors.some(sel => el.matches(sel));
+    }
 
-    # 定义展开函数
-    expand_js = """
-    function expandShadowRoots(root) {
-        const elements = Array.from(root.querySelectorAll('*'));
-        let count = 0;
-
-        for (const el of elements) {
-            if (el.shadowRoot && !el.shadowRoot.__expanded) {
-                const container = document.createElement('div');
-                container.className = '__shadow_contents';
-                container.innerHTML = el.shadowRoot.innerHTML;
-                el.appendChild(container);
-                el.shadowRoot.__expanded = true;
-                count++;
-
-                // 递归展开新添加的内容
-                count += expandShadowRoots(container);
+    function expand(root, depth) {
+        for (const el of Array.from(root.querySelectorAll('*'))) {
+            if (!el.shadowRoot || el.__shadowExpanded || !allowed(el)) continue;
+            // 顶层只处理页面原有的宿主，展平副本中的元素只在本次递归里处理，避免重复展开
+            if (depth === 0 && el.closest('div.__shadow_contents')) continue;
+            const html = el.shadowRoot.innerHTML;
+            if (stats.nodes >= maxNodes || stats.chars + html.length > maxChars) {
+                stats.truncated = true;
+                continue;
             }
+            const container = document.createElement('div');
+            container.className = '__shadow_contents';
+            container.innerHTML = html;
+            el.appendChild(container);
+            el.__shadowExpanded = true;
+            stats.roots += 1;
+            stats.chars += html.length;
+            stats.nodes += container.getElementsByTagName('*').length;
+            if (depth + 1 < maxDepth) expand(container, depth + 1);
         }
-        return count;
     }
 
-    // 从 document.body 开始
-    return expandShadowRoots(document.body);
+    expand(document.body, 0);
+    return stats;
+"""
+
+# 各页面需要展开的宿主元素选择器，None 表示展开全部 shadowRoot；
+# 例如 ["build-status"] 只展开 build-status 自身，不再展开其中的图标、按钮等子组件
+INDEX_FLATTEN_SELECTORS = None
+PROJECT_FLATTEN_SELECTORS = None
+
+# 展平预算：最多生成的节点数、复制的字符数与递归深度
+FLATTEN_MAX_NODES = 200000
+FLATTEN_MAX_CHARS = 20 * 1024 * 1024
+FLATTEN_MAX_DEPTH = 8
+
+
+def expand_shadow_dom(driver, selectors=None, max_nodes=FLATTEN_MAX_NODES, max_chars=FLATTEN_MAX_CHARS,
+                      max_depth=FLATTEN_MAX_DEPTH, quiet=False):
+    """
+    递归展开页面中的 Shadow DOM，返回 {"roots", "nodes", "chars", "truncated"}
+    selectors: 只展开匹配这些 CSS 选择器的宿主元素，None 表示全部
+    max_nodes / max_chars / max_depth: 本次展开生成的节点数、复制的字符数和递归深度上限
+    已展开过的宿主不会重复展开
     """
+    stats = driver.execute_script(FLATTEN_JS, selectors, max_nodes, max_chars, max_depth)
+    if not quiet:
+        print(f"🔍 Shadow DOM已展平 ({stats['roots']} 个 shadowRoot, {stats['nodes']} 个节点, "
+              f"{stats['chars']} 字符{', 已达预算上限' if stats['truncated'] else ''})")
+    return stats
+
+
+def expand_shadow_dom_with_timeout(driver, timeout=3, selectors=None):
+    """递归展开页面中的Shadow DOM，但最多执行指定秒数，直到没有新的 shadowRoot 可展开"""
+    start_time = time.time()
 
     print(f"⏱️ 开始展平Shadow DOM，最多等待{timeout}秒...")
 
     # 使用循环逐步展开，而不是一次性执行
     while time.time() - start_time < timeout:
-        cnt = driver.execute_script(expand_js)
-        if cnt == 0:
+        stats = expand_shadow_dom(driver, selectors, quiet=True)
+        if stats["roots"] == 0 or stats["truncated"]:
             print("✅ Shadow DOM已完全展平")
             return
         time.sleep(0.1)  # 短暂暂停避免过度占用CPU
@@ -116,9 +246,351 @@ def expand_shadow_dom_with_timeout(driver, timeout=3):
     print(f"⏱️ 时间到，已展平部分Shadow DOM")
 
 
-def extract_build_log_urls(chromedriver_path, url, combined, mark):
+def create_chrome_driver(chromedriver_path, enable_gpu=False, window_size=None):
+    """按统一配置启动一个无头 Chrome"""
+    opts = Options()
+    opts.add_argument("--headless")
+    opts.add_argument("--enable-gpu" if enable_gpu else "--disable-gpu")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument(
+        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
+    )
+    if window_size:
+        opts.add_argument(f"--window-size={window_size}")
+    service = Service(executable_path=chromedriver_path)
+    with timed_phase("browser_launch"):
+        driver = webdriver.Chrome(service=service, options=opts)
+    # 设置脚本执行超时时间，防止海量日志导致超时
+    driver.set_script_timeout(120)
+    return driver
+
+
+def open_project_page(driver, url):
+    """打开项目页面并等待 build-status 加载完毕，加载失败或超时按 PAGE_RETRY 退避后重试"""
+    attempts = [0]
+
+    def load():
+        attempts[0] += 1
+        if attempts[0] > 1:
+            # 项目页是 index.html#项目名，再次打开同一地址只是片段跳转，不会重新加载，
+            # 重试前先跳到空白页，确保页面真正重新加载
+            driver.get("about:blank")
+        driver.get(url)
+        wait_for_project_page(driver)
+    with timed_phase("page_load", project=project_name_from_url(url)):
+        PAGE_RETRY.call(load, description=f"加载页面 {url}")
+
+
+def load_build_status_page(driver, url, flatten=True):
+    """打开项目页面，等待 build-status 加载完毕，flatten=True 时再展平 Shadow DOM"""
+    open_project_page(driver, url)
+    if flatten:
+        with timed_phase("flatten", project=project_name_from_url(url)):
+            expand_shadow_dom(driver, PROJECT_FLATTEN_SELECTORS)
+
+
+def reset_log_panel(driver):
+    """
+    清除上一次点击后展平出来的副本，只重置日志面板相关内容，
+    使下一次展平能拿到新点击按钮对应的日志链接
+    """
+    driver.execute_script("""
+        document.querySelectorAll('div.__shadow_contents').forEach(el => el.remove());
+        document.querySelectorAll('*').forEach(el => { el.__shadowExpanded = false; });
+    """)
+
+
+def click_build_button(driver, index, max_retries=2):
+    """点击 build-status 中的按钮（"GREEN" 或历史按钮下标），返回是否成功"""
+    retry_count = 0
+    success = False
+
+    # 重试循环
+    while retry_count <= max_retries and not success:
+        try:
+            success = driver.execute_script("""
+                const idx = arguments[0];
+                const buildStatus = document.querySelector('body > build-status, body > * > build-status');
+                if (!buildStatus || !buildStatus.shadowRoot) return false;
+                const shadow = buildStatus.shadowRoot;
+
+                let btn;
+                if (idx === "GREEN") {
+                    btn = shadow.querySelector('paper-button.green');
+                } else {
+                    const buildHistory = shadow.querySelector('div.buildHistory');
+                    const buttons = buildHistory ? buildHistory.querySelectorAll('paper-button') : [];
+                    btn = buttons[idx];
+                }
+
+                if (btn) {
+                    btn.click();
+                    return true;
+                }
+                return false;
+            """, index)
+
+            if not success:
+                print(f"⚠️ 无法点击按钮 #{index}")
+                raise Exception("JavaScript点击操作失败")
+
+            print(f"✅ 按钮 #{index} 已点击 (尝试 {retry_count + 1}/{max_retries + 1})")
+            success = True
+
+        except Exception as e:
+            error_msg = str(e)
+            print(f"❌ 尝试 #{retry_count + 1} 失败: {error_msg}")
+            if "Read timed out" in error_msg and retry_count < max_retries:
+                retry_count += 1
+                print(f"♻️ 将在 {2 ** retry_count} 秒后重试...")
+                time.sleep(2 ** retry_count)
+            else:
+                break
+
+    return success
+
+
+def find_log_url(page_html):
+    """
+    从页面HTML中找到日志面板中第一个 /log-*.txt 链接并拼接为完整URL，未找到返回 None；
+    历史按钮 (paper-button) 自身带的链接不是本次点击加载的日志，跳过
+    """
+    soup = BeautifulSoup(page_html, 'html.parser')
+    for link in soup.find_all('a', href=True):
+        href = link.get('href', '')
+        if href.startswith('/log-') and href.endswith('.txt') and link.find_parent('paper-button') is None:
+            return LOG_HOST_URL + href
+    return None
+
+
+def date_and_state(timestamp, status):
+    """日志保存文件名：日期部分 (精确到天) + 状态，如 "2025_10_12 error" """
+    date_part = timestamp.split()[0].replace("/", "_")
+    status_str = "success" if status == 1 else "error"
+    return date_part + " " + status_str
+
+
+# 一次性读取 build-status 中全部按钮信息：序号、可见文本、状态图标、是否为绿色按钮、已有的日志链接
+HISTORY_ENTRIES_JS = """
+    const host = document.querySelector('build-status');
+    if (!host || !host.shadowRoot) return [];
+    const shadow = host.shadowRoot;
+    function describe(btn, index, green) {
+        const icon = btn.querySelector('iron-icon[icon]');
+        let iconName = icon ? icon.getAttribute('icon') : null;
+        if (!iconName) {
+            const html = btn.outerHTML;
+            iconName = html.includes('icon="icons:done"') ? 'icons:done'
+                : html.includes('icon="icons:error"') ? 'icons:error' : null;
+        }
+        const link = btn.querySelector('a[href^="/log-"][href$=".txt"]');
+        return {
+            index: index,
+            text: (btn.innerText || btn.textContent || '').replace(/\\s+/g, ' ').trim(),
+            icon: iconName,
+            green: green,
+            log_href: link ? link.getAttribute('href') : null
+        };
+    }
+    const result = [];
+    const greenBtn = shadow.querySelector('paper-button.green');
+    if (greenBtn) result.push(describe(greenBtn, "GREEN", true));
+    const history = shadow.querySelector('div.buildHistory');
+    if (history) {
+        history.querySelectorAll('paper-button').forEach((btn, i) => result.push(describe(btn, i, false)));
+    }
+    return result;
+"""
+
+# 按钮文本中的构建时间，例如 2025/10/12 15:04:12
+TIMESTAMP_PATTERN = re.compile(r"\d{4}/\d{1,2}/\d{1,2}\s*\d{1,2}:\d{2}:\d{2}")
+
+
+def parse_history_entries(entries):
+    """
+    解析 HISTORY_ENTRIES_JS 的返回值，返回
+    (历史按钮条目列表, 时间戳列表, 状态列表 note, 绿色按钮时间戳或 None, {按钮序号: 已有日志 href})
+    note 中 1=成功 (icons:done)，0=失败 (icons:error)，-1=未知
+    """
+    history = [e for e in entries if not e.get("green")]
+    timestamps = []
+    note = []
+    for entry in history:
+        m = TIMESTAMP_PATTERN.search(entry.get("text") or "")
+        timestamps.append(m.group() if m else "unknown_time")
+        icon = entry.get("icon")
+        note.append(1 if icon == "icons:done" else 0 if icon == "icons:error" else -1)
+
+    green_ts = None
+    for entry in entries:
+        if entry.get("green"):
+            m = TIMESTAMP_PATTERN.search(entry.get("text") or "")
+            green_ts = m.group() if m else "unknown_time"
+
+    known_hrefs = {e["index"]: e["log_href"] for e in entries if e.get("log_href")}
+    return history, timestamps, note, green_ts, known_hrefs
+
+
+def compute_mark(note):
+    """
+    根据按钮状态列表 note (1=成功, 0=失败, -1=未知) 生成 mark 数组：
+    连续相同状态只保留边界按钮，其余标记为 3 (跳过)；
+    历史记录中完全没有成功状态时第一个按钮 (#0) 强制保留。
+    返回 (mark, 需要处理的按钮数量)
+    """
+    has_success_in_history = (1 in note)
+    mark = []
+    number = 0
+    for i in range(len(note)):
+        # 兜底规则：如果历史记录中完全没有成功状态，则第一个按钮 (#0) 强制保留
+        if i == 0 and not has_success_in_history:
+            mark.append(note[i])
+            number += 1
+            continue
+
+        # 原始去重逻辑
+        if len(note) == 1:
+            mark.append(note[i])
+            number += 1
+        elif i == 0 and i + 1 < len(note) and note[i] == note[i + 1]:
+            mark.append(3)
+        elif i == len(note) - 1 and i - 1 >= 0 and note[i] == note[i - 1]:
+            mark.append(3)
+        elif i - 1 >= 0 and i + 1 < len(note) and note[i] == note[i - 1] and note[i] == note[i + 1]:
+            mark.append(3)
+        else:
+            mark.append(note[i])
+            number += 1
+    return mark, number
+
+
+def extract_log_url(driver, previous_href=None, link_extraction=LOG_LINK_EXTRACTION):
+    """
+    点击按钮后获取日志文件URL，未找到返回 None
+    link_extraction="targeted"：直接在 build-status 的 shadowRoot 中查询日志链接，只取回 href，
+    不序列化整个页面也不做 HTML 解析；"soup"：旧方式，展平 Shadow DOM 后用 BeautifulSoup 解析 page_source
+    """
+    href = wait_for_log_link(driver, previous_href)
+    if not href:
+        return None
+    if link_extraction == "targeted":
+        return urljoin(driver.current_url, href)
+    with timed_phase("flatten"):
+        expand_shadow_dom_with_timeout(driver, 3, PROJECT_FLATTEN_SELECTORS)
+    with timed_phase("page_source") as event:
+        page_html = driver.page_source
+        event["chars"] = len(page_html)
+    with timed_phase("parse"):
+        return find_log_url(page_html)
+
+
+def extract_build_log_urls(chromedriver_path, url, combined, mark, driver=None, reuse_session=True,
+                           link_extraction=LOG_LINK_EXTRACTION, on_log_url=None):
     """
     从combined列表处理按钮点击并提取日志URL
+    reuse_session=True 时整个项目只使用一个浏览器：页面只加载一次，之后依次点击各按钮，
+    两次点击之间只重置日志面板；传入 driver 时认为页面已加载完毕，直接复用且不负责关闭。
+    reuse_session=False 时保留旧行为：每个按钮单独启动浏览器并重新加载页面。
+    link_extraction 见 extract_log_url
+    传入 on_log_url(日志URL, 保存文件名) 时每找到一个日志立即回调，供下载阶段尽早开始
+    """
+    if not reuse_session:
+        return _extract_build_log_urls_per_button(chromedriver_path, url, combined, mark, link_extraction,
+                                                  on_log_url)
+    soup_mode = link_extraction != "targeted"
+
+    log_url_list = []
+    date_and_state_list = []
+    own_driver = driver is None
+    project_name = project_name_from_url(url)
+    # 本次会话中已找到日志的构建 (时间, 状态) -> 日志URL，同一次构建的另一个按钮直接复用
+    found_logs = {}
+
+    try:
+        if own_driver:
+            driver = create_chrome_driver(chromedriver_path)
+            load_build_status_page(driver, url, flatten=soup_mode)
+
+        for idx_in_loop in range(len(combined)):
+            index, timestamp, status = combined[idx_in_loop]
+
+            if mark[idx_in_loop] == 3:  # 跳过不需要的按钮
+                continue
+
+            status_str = "success" if status == 1 else "error"
+
+            if (timestamp, status) in found_logs:
+                # 如绿色按钮与历史中对应的成功构建：日志相同，点击后面板也不会变化，不必等待
+                log_url = found_logs[(timestamp, status)]
+                print(f"🔗 按钮 #{index} 与已处理的按钮为同一次构建，沿用日志URL: {log_url}")
+                log_url_list.append(log_url)
+                date_and_state_list.append(date_and_state(timestamp, status))
+                if on_log_url:
+                    on_log_url(log_url, date_and_state_list[-1])
+                continue
+
+            try:
+                # 清掉上一个按钮留下的日志面板副本（只有展平过的页面才有）
+                if soup_mode:
+                    reset_log_panel(driver)
+
+                # 记下点击前面板中的日志链接，用于判断新日志是否已经加载
+                previous_href = current_log_href(driver)
+
+                print(f"🖱️ 点击按钮 #{index} ({timestamp}, {status_str})...")
+                with timed_phase("click", project=project_name, button=index) as event:
+                    clicked = event["ok"] = click_build_button(driver, index)
+                if not clicked:
+                    print(f"⚠️ 无法点击按钮 #{index}，跳过")
+                    append_line("wrong_url_list.txt", url)
+                    continue
+
+                print("⏳ 等待日志加载...")
+                with timed_phase("log_link", project=project_name, button=index) as event:
+                    log_url = extract_log_url(driver, previous_href, link_extraction)
+                    event["ok"] = bool(log_url)
+
+                if log_url:
+                    print(f"🔗 找到日志文件URL: {log_url}")
+                    found_logs[(timestamp, status)] = log_url
+                    log_url_list.append(log_url)
+                    date_and_state_list.append(date_and_state(timestamp, status))
+                    get_log_cache().note_build(project_name, timestamp, status, log_uuid(log_url))
+                    if on_log_url:
+                        on_log_url(log_url, date_and_state_list[-1])
+                else:
+                    print("⚠️ 未找到日志文件URL")
+                    append_line("wrong_url_list.txt", url)
+
+            except Exception as e:
+                print(f"❌ 处理按钮 #{index} 时发生错误: {str(e)}")
+                append_line("wrong_url_list.txt", url)
+                # 会话可能已经损坏，重新加载页面后继续处理后面的按钮；
+                # 直接打开同一个 #项目名 地址不会重新加载，先跳到空白页
+                try:
+                    driver.get("about:blank")
+                    load_build_status_page(driver, url, flatten=soup_mode)
+                except Exception as reload_error:
+                    print(f"❌ 重新加载页面失败，放弃剩余按钮: {str(reload_error)}")
+                    break
+
+    except Exception as e:
+        print(f"❌ 加载页面 {url} 时发生错误: {str(e)}")
+        append_line("wrong_url_list.txt", url)
+
+    finally:
+        if own_driver and driver:
+            driver.quit()
+            print("🚪 项目会话浏览器已关闭")
+
+    return log_url_list, date_and_state_list
+
+
+def _extract_build_log_urls_per_button(chromedriver_path, url, combined, mark, link_extraction=LOG_LINK_EXTRACTION,
+                                       on_log_url=None):
+    """
+    旧模式：每个按钮启动一个新浏览器并重新加载页面
     修复了 script timeout 报错，并恢复了原始日志打印格式
     """
     log_url_list = []
@@ -133,133 +605,50 @@ def extract_build_log_urls(chromedriver_path, url, combined, mark):
 
         driver = None
         try:
-            # 初始化ChromeDriver
-            opts = Options()
-            opts.add_argument("--headless")
-            opts.add_argument("--disable-gpu")
-            opts.add_argument("--no-sandbox")
-            opts.add_argument(
-                "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
-            )
-            service = Service(executable_path=chromedriver_path)
-            driver = webdriver.Chrome(service=service, options=opts)
-
-            # --- 关键修复：设置脚本执行超时时间，防止海量日志导致超时 ---
-            driver.set_script_timeout(120)
-
-            # 访问URL
-            driver.get(url)
-
-            # 等待 build-status 出现
-            WebDriverWait(driver, 100).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "build-status"))
-            )
-            time.sleep(20)
-
-            # 初始展开Shadow DOM
-            expand_shadow_dom(driver)
+            # 初始化ChromeDriver并加载页面
+            driver = create_chrome_driver(chromedriver_path)
+            load_build_status_page(driver, url, flatten=link_extraction != "targeted")
 
             # 提取日期部分
-            date_part = timestamp.split()[0].replace("/", "_")
             status_str = "success" if status == 1 else "error"
 
             # --- 恢复原始打印格式 ---
             print(f"🖱️ 点击按钮 #{index} ({timestamp}, {status_str})...")
 
-            max_retries = 2
-            retry_count = 0
-            success = False
-
-            # 重试循环
-            while retry_count <= max_retries and not success:
-                try:
-                    success = driver.execute_script("""
-                        const idx = arguments[0];
-                        const buildStatus = document.querySelector('body > build-status, body > * > build-status');
-                        if (!buildStatus || !buildStatus.shadowRoot) return false;
-                        const shadow = buildStatus.shadowRoot;
-
-                        let btn;
-                        if (idx === "GREEN") {
-                            btn = shadow.querySelector('paper-button.green');
-                        } else {
-                            const buildHistory = shadow.querySelector('div.buildHistory');
-                            const buttons = buildHistory ? buildHistory.querySelectorAll('paper-button') : [];
-                            btn = buttons[idx];
-                        }
-
-                        if (btn) {
-                            btn.click();
-                            return true;
-                        }
-                        return false;
-                    """, index)
-
-                    if not success:
-                        print(f"⚠️ 无法点击按钮 #{index}")
-                        raise Exception("JavaScript点击操作失败")
-
-                    print(f"✅ 按钮 #{index} 已点击 (尝试 {retry_count + 1}/{max_retries + 1})")
-                    success = True
-
-                except Exception as e:
-                    error_msg = str(e)
-                    print(f"❌ 尝试 #{retry_count + 1} 失败: {error_msg}")
-                    if "Read timed out" in error_msg and retry_count < max_retries:
-                        retry_count += 1
-                        print(f"♻️ 将在 {2 ** retry_count} 秒后重试...")
-                        time.sleep(2 ** retry_count)
-                    else:
-                        break
-
-            if not success:
+            if not click_build_button(driver, index):
                 print(f"⚠️ 无法点击按钮 #{index}，跳过")
-                with open("wrong_url_list.txt", "a", encoding="utf-8") as fi:
-                    fi.write(url + "\n")
+                append_line("wrong_url_list.txt", url)
                 continue
 
             # 等待日志加载
             print("⏳ 等待日志加载...")
-            expand_shadow_dom_with_timeout(driver, 3)
-
-            # 获取页面HTML
-            page_html = driver.page_source
 
             # 提取日志文件URL
-            log_url = None
             try:
-                soup = BeautifulSoup(page_html, 'html.parser')
-                log_links = soup.find_all('a', href=True)
-
-                for link in log_links:
-                    href = link.get('href', '')
-                    if href.startswith('/log-') and href.endswith('.txt'):
-                        log_url = f"https://oss-fuzz-build-logs.storage.googleapis.com{href}"
-                        # --- 恢复原始打印格式 ---
-                        print(f"🔗 找到日志文件URL: {log_url}")
-                        log_url_list.append(log_url)
-                        date_and_state_list.append(date_part + " " + status_str)
-                        break
-
-                if not log_url:
+                log_url = extract_log_url(driver, link_extraction=link_extraction)
+                if log_url:
+                    # --- 恢复原始打印格式 ---
+                    print(f"🔗 找到日志文件URL: {log_url}")
+                    log_url_list.append(log_url)
+                    date_and_state_list.append(date_and_state(timestamp, status))
+                    get_log_cache().note_build(project_name_from_url(url), timestamp, status, log_uuid(log_url))
+                    if on_log_url:
+                        on_log_url(log_url, date_and_state_list[-1])
+                else:
                     print("⚠️ 未找到日志文件URL")
-                    with open("wrong_url_list.txt", "a", encoding="utf-8") as fi:
-                        fi.write(url + "\n")
+                    append_line("wrong_url_list.txt", url)
 
             except Exception as e:
                 print(f"❌ 日志URL提取失败: {str(e)}")
-                with open("wrong_url_list.txt", "a", encoding="utf-8") as fi:
-                    fi.write(url + "\n")
+                append_line("wrong_url_list.txt", url)
 
         except Exception as e:
             print(f"❌ 处理按钮 #{index} 时发生错误: {str(e)}")
-            with open("wrong_url_list.txt", "a", encoding="utf-8") as fi:
-                fi.write(url + "\n")
+            append_line("wrong_url_list.txt", url)
             continue
 
         finally:
-            if 'driver' in locals() and driver:
+            if driver:
                 driver.quit()
                 # --- 恢复原始打印格式 ---
                 print(f"🚪 按钮 #{index} 的浏览器已关闭")
@@ -267,239 +656,311 @@ def extract_build_log_urls(chromedriver_path, url, combined, mark):
     return log_url_list, date_and_state_list
 
 
-def fetch_rendered_page(chromedriver_path: str, output_path: str):
+def fetch_index_snapshot(chromedriver_path: str) -> str:
     """
-    展开所有 shadowRoot，对目标url进行获取
+    启动 Chrome 渲染一次首页，展开所有 shadowRoot 并返回渲染后的 HTML，
+    供存档和失败项目提取共同使用
     """
-    # 1. Chrome 启动配置
-    opts = Options()
-    opts.add_argument("--headless")
-    opts.add_argument("--disable-gpu")
-    opts.add_argument("--no-sandbox")
-    # 匹配浏览器请求头，模拟真实 Chrome
-    opts.add_argument(
-        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
-    )
-
-    # 2. 指定 chromedriver 可执行文件
-    service = Service(executable_path=chromedriver_path)
-    driver = webdriver.Chrome(service=service, options=opts)
-
+    driver = create_chrome_driver(chromedriver_path)
     try:
-        driver.get("https://oss-fuzz-build-logs.storage.googleapis.com/index.html")
-
-        # 等待 build-status 出现并异步加载完毕
-        WebDriverWait(driver, 100).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "build-status"))
-        )
-        time.sleep(20)
-
-        # —— 递归展开所有 shadowRoot
-        expand_shadow_dom(driver)
-        rendered_html = driver.page_source
-
-        # 6. 保存到本地文件
-        with open(output_path, "a", encoding="utf-8") as f:
-            f.write(rendered_html)
-        print(f"✅ 渲染后页面已保存到 {output_path}")
+        # 等待 build-status 渲染完毕且项目列表稳定，失败时按 PAGE_RETRY 退避后重试
+        def load():
+            driver.get(INDEX_URL)
+            wait_for_index_page(driver)
+        with timed_phase("index_load"):
+            PAGE_RETRY.call(load, description="加载首页")
+
+        # —— 递归展开 shadowRoot（范围与预算见 expand_shadow_dom）
+        with timed_phase("index_flatten") as event:
+            expand_shadow_dom(driver, INDEX_FLATTEN_SELECTORS)
+            rendered_html = driver.page_source
+            event["bytes"] = len(rendered_html)
+        return rendered_html
 
     finally:
         driver.quit()
 
 
+def fetch_rendered_page(chromedriver_path: str, archive=None, rendered_html: str = None):
+    """
+    展开所有 shadowRoot，对目标url进行获取，并作为一份独立的压缩快照存入首页快照存档；
+    已有本次运行的首页快照时直接传入 rendered_html，不再重新渲染。
+    存档中已有上一次快照时，打印两次之间状态翻转的项目。返回本次快照的清单记录
+    """
+    if rendered_html is None:
+        rendered_html = fetch_index_snapshot(chromedriver_path)
+    archive = archive or get_snapshot_archive()
+
+    previous = archive.latest(1)
+    entry = archive.save(rendered_html)
+    print(f"✅ 渲染后页面已存档为 {os.path.join(archive.directory, entry['file'])} "
+          f"({entry['size'] / 1024:.0f} KB → {entry['compressed_size'] / 1024:.0f} KB)")
+    if previous:
+        try:
+            print_diff(archive.diff(previous[0], entry), previous[0]["file"], entry["file"])
+        except (OSError, EOFError) as e:
+            print(f"⚠️ 上一次快照无法读取，跳过对比: {str(e)}")
+    return entry
+
+
 def extract_between_markers(html: str) -> List[str]:
     """
-    使用正则表达式从 html 文本中抽取所有外层 <div>…</div> 结构内的项目名，
+    从 html 文本中抽取所有外层 <div>…</div> 结构内的项目名，
     仅在该 <div> 内含有 icon="icons:error" 才匹配。
-    对每个匹配结果，去掉可能残留的 '/dom-if>' 前缀，只保留真正的项目名。
-    """
-    pattern = re.compile(
-        r'<iron-icon[^>]*icon=["\']icons:error["\'][\s\S]*?</iron-icon>'  # 包含 error 图标
-        r'[\s\S]*?'  # 中间任意内容（shadow DOM、dom-if 等）
-        r'([^<\s][^<]+?)\s*'  # 捕获非空白开头直到下一个 '<' 之间的文本
-        r'</div>',  # 直到外层 </div>
-        re.IGNORECASE
-    )
-    raw = pattern.findall(html)
-    cleaned = []
-    for m in raw:
-        # m 里可能是 "/dom-if>\n                  zip-rs"
-        # split by '>'，取最后一段，再 strip 掉前后空白
-        name = m.split('>')[-1].strip()
-        cleaned.append(name)
-    return cleaned
+    由 index_extractor 单次线性扫描完成，页面越来越大时耗时也只线性增长。
+    """
+    return extract_error_projects(html)
 
 
-def fetch_and_extract(chromedriver_path: str) -> List[str]:
+def fetch_and_extract(chromedriver_path: str, rendered_html: str = None, feed_projects=None) -> List[str]:
     """
     启动 Chrome、展平 Shadow DOM、获取页面 HTML，
     并提取所有项目名称对应的url，最后以列表形式返回。
+    已有本次运行的首页快照时直接传入 rendered_html，不再重新渲染；
+    传入 feed_projects（状态 JSON 解析结果）时直接从中取最近一次构建失败的项目。
     """
-    opts = Options()
-    opts.add_argument("--headless")
-    opts.add_argument("--disable-gpu")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument(
-        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
-    )
+    if feed_projects is not None:
+        return failing_projects(feed_projects)
+    if rendered_html is None:
+        rendered_html = fetch_index_snapshot(chromedriver_path)
 
-    service = Service(executable_path=chromedriver_path)
-    driver = webdriver.Chrome(service=service, options=opts)
-    try:
-        driver.get("https://oss-fuzz-build-logs.storage.googleapis.com/index.html")
-        WebDriverWait(driver, 100).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "build-status"))
-        )
-        time.sleep(20)
+    # 提取并返回所有匹配的片段列表
+    return extract_between_markers(rendered_html)
 
-        # 展平所有 Shadow DOM
-        expand_shadow_dom(driver)
-        # 获取完整渲染后的 HTML
-        rendered_html = driver.page_source
 
-        # 提取并返回所有匹配的片段列表
-        return extract_between_markers(rendered_html)
-
-    finally:
-        driver.quit()
+def store_downloaded_log(full_path):
+    """
+    下载完成的原文日志按内容 sha256 存入 blob 目录，同一内容只保存一份，
+    项目目录中只留下指向它的硬链接（或 .ref 引用）；返回 (项目目录中的条目路径, 原文 sha256)
+    """
+    store = get_blob_store()
+    sha256 = file_sha256(full_path)
+    # 内容已存在时不必再压缩，直接丢弃本次下载的副本
+    path = full_path if store.find(sha256) else compress_file(full_path, LOG_COMPRESSION)
+    return store.link(store.adopt(path, sha256), full_path), sha256
 
 
-def download_with_urllib(log_url, log_filename, project_name, step):
+def download_with_urllib(log_url, log_filename, project_name, stats=None, policy=None):
     """
-    将目标 log 下载到本地
-    参数依次是日志下载url列表，存储文件名列表，存储文件夹名称，重试次数
+    将目标 log 下载到本地，保存为 "<日期> <状态> <UUID>" 并写入项目日志索引，返回是否成功
+    参数依次是日志下载url，存储文件名，存储文件夹名称
+    连接取自共享的 keep-alive 连接池，不再为每个日志重新建立 HTTPS 连接；
+    内容边下载边写入临时文件，完成后原子重命名为正式文件；
+    可重试的错误按 policy（默认 DOWNLOAD_RETRY）退避后重试并从断点续传，404 等永久错误直接失败；
+    传入 stats (DownloadStats) 时记录字节数与耗时
     """
     try:
-        # 创建自定义上下文，忽略SSL验证
-        context = ssl.create_default_context()
-        context.check_hostname = False
-        context.verify_mode = ssl.CERT_NONE
-
-        # 设置自定义 User-Agent
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
-        }
-
-        # 创建请求
-        req = urllib.request.Request(log_url, headers=headers)
-
         print(f"⬇️ 开始下载日志 (urllib): {log_url}")
-        with urllib.request.urlopen(req, context=context, timeout=50) as response:
-            data = response.read()
-
-            # 构建保存目录：./build_error_log_of_projects/项目名
-            base_dir = "build_error_log_of_projects"
-            target_dir = os.path.join(base_dir, project_name)
 
-            # 确保保存文件夹存在
-            os.makedirs(target_dir, exist_ok=True)
+        # 构建保存目录：./build_error_log_of_projects/项目名
+        target_dir = os.path.join(LOG_DIR, project_name)
 
-            # 构建完整的文件路径
-            full_path = os.path.join(target_dir, log_filename)
+        # 确保保存文件夹存在
+        os.makedirs(target_dir, exist_ok=True)
 
-            # 保存文件
-            with open(full_path, "wb") as log_file:
-                log_file.write(data)
+        # 文件名带上日志 UUID，同一天同状态的多次构建不会互相覆盖
+        uuid = log_uuid(log_url)
+        full_path = os.path.join(target_dir, f"{log_filename} {uuid}" if uuid else log_filename)
 
-            print(f"💾 日志已下载并保存到: {full_path}")
-            print(f"📝 日志大小: {len(data)} 字符")
+        # 项目索引中已有该 UUID 且文件完好时不再走网络
+        cache = get_log_cache()
+        cached = cache.lookup(project_name, uuid)
+        if cached:
+            print(f"⏭️ 日志已缓存，跳过下载: {cache.entry_path(project_name, cached)}")
+            emit_event("cache_hit", project=project_name, uuid=uuid)
             return True
 
+        # 流式写入临时文件，完成后原子重命名，不在内存中缓存整个日志
+        start_time = time.time()
+        with timed_phase("download", project=project_name, uuid=uuid) as event:
+            size = event["bytes"] = (policy or DOWNLOAD_RETRY).call(stream_to_file, log_url, full_path,
+                                                                    description=f"下载 {log_url}")
+        elapsed = time.time() - start_time
+        # 按内容去重存入 blob 目录（开启压缩存储时先转存为 .gz / .zst）
+        with timed_phase("store", project=project_name, uuid=uuid):
+            saved_path, sha256 = store_downloaded_log(full_path)
+
+        print(f"💾 日志已下载并保存到: {saved_path}")
+        print(f"📝 日志大小: {size} 字符")
+        if compression_of(saved_path):
+            print(f"🗜️ 压缩后大小: {os.path.getsize(saved_path)} 字节")
+        print(f"⚡ 下载耗时: {elapsed:.2f} 秒 ({format_rate(size, elapsed)})")
+        if stats is not None:
+            stats.record(size, elapsed)
+        cache.record(project_name, uuid, saved_path, log_url, sha256=sha256)
+        return True
+
     except Exception as e:
         print(f"❌ 下载日志文件失败 (urllib): {str(e)}")
-        if step < 3:
-            print(f"✅ 下载日志文件重试 (urllib): {step + 1}/3")
-            download_with_urllib(log_url, log_filename, project_name, step + 1)
+        if stats is not None:
+            stats.record_failure()
         return False
 
 
-def fetch_rendered_page_and_done(chromedriver_path, url, step):
+def download_logs(log_url_list, date_and_state_list, project_name, workers=DOWNLOAD_WORKERS):
     """
-    增加了绿色按钮检测和全失败兜底逻辑
+    并发下载一个项目的日志，最多 workers 个同时进行，结束后打印汇总吞吐量；
+    返回去重后每个日志的下载结果列表
     """
-    project_name = url.split("#")[-1] if "#" in url else "unknown_project"
-    opts = Options()
-    opts.add_argument("--headless")
-    opts.add_argument("--enable-gpu")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument(
-        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
-    )
-    opts.add_argument("--window-size=1200,900")
+    stats = DownloadStats()
+    # 同一日志可能被多个按钮指向（如绿色按钮与历史中的同一次成功构建），只下载一次，
+    # 也避免两个线程同时写同一个临时文件
+    seen = {}
+    for i, log_url in enumerate(log_url_list):
+        seen.setdefault((log_url, date_and_state_list[i]), i)
+    if len(seen) < len(log_url_list):
+        log_url_list = [key[0] for key in seen]
+        date_and_state_list = [key[1] for key in seen]
+    if workers <= 1 or len(log_url_list) <= 1:
+        results = [download_with_urllib(log_url, date_and_state_list[i], project_name, stats)
+                   for i, log_url in enumerate(log_url_list)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(download_with_urllib, log_url, date_and_state_list[i], project_name, stats)
+                       for i, log_url in enumerate(log_url_list)]
+            results = [f.result() for f in futures]
+    if log_url_list:
+        stats.report()
+        get_blob_store().report()
+    get_log_cache().save()
+    return results
+
+
+def process_project_from_feed(url, project_info, incremental=False, on_log_url=None):
+    """
+    使用状态 JSON 中的构建历史处理单个项目：按与页面相同的规则筛选构建，
+    日志URL由 build_id 直接得到，全程不需要浏览器
+    incremental=True 时构建历史与上次抓取相比没有变化则直接跳过
+    on_log_url 见 fetch_rendered_page_and_done
+    """
+    project_name = project_info["name"]
+    history = project_info["history"]
+    print(f"📡 使用状态数据处理项目: {project_name}")
+
+    state_builds = [{"timestamp": b["timestamp"], "status": b["status"], "log_id": b["build_id"]}
+                    for b in history]
+    note = [build["status"] for build in history]
+    mark, number = compute_mark(note)
+    builds = list(history)
+
+    green = project_info["last_successful_build"]
+    if green:
+        builds.insert(0, green)
+        mark.insert(0, 1)  # 强制执行
+        number += 1
+        print(f"✨ 已捕获最后成功构建时间: {green['timestamp']}")
+
+    print(f"📊 构建状态统计: 成功={note.count(1)}, 失败={note.count(0)}, 未知={note.count(-1)}")
+
+    if number != 0:
+        append_line("target_url_list.txt", url)
+
+    # 与浏览器路径一致，先记入目标列表再判断是否跳过，仍在失败的项目不会从下次的待抓取列表中消失
+    crawl_state = get_crawl_state()
+    if incremental and not crawl_state.is_changed(project_name, state_builds):
+        print("⏭️ 构建历史与上次抓取相同，跳过")
+        return {
+            "project": project_name,
+            "total_buttons": len(history),
+            "processed": 0
+        }
+
+    if number != 0:
+        log_url_list = []
+        date_and_state_list = []
+        for build, m in zip(builds, mark):
+            if m == 3 or not build["log_url"]:
+                continue
+            print(f"🔗 找到日志文件URL: {build['log_url']}")
+            get_log_cache().note_build(project_name, build["timestamp"], build["status"], build["build_id"])
+            log_url_list.append(build["log_url"])
+            date_and_state_list.append(date_and_state(build["timestamp"], build["status"]))
+            if on_log_url:
+                on_log_url(log_url_list[-1], date_and_state_list[-1])
+        if on_log_url:
+            # 下载由调用方负责，下载全部成功后再由调用方记录抓取状态
+            return {
+                "project": project_name,
+                "total_buttons": len(history),
+                "processed": number,
+                "crawl_builds": state_builds
+            }
+        results = download_logs(log_url_list, date_and_state_list, project_name)
+        print("✅ 所有构建日志处理完成")
+        if not all(results):
+            # 有日志没下载成功，不更新抓取状态，下次仍会重新处理
+            return {
+                "project": project_name,
+                "total_buttons": len(history),
+                "processed": number
+            }
 
-    driver = webdriver.Chrome(service=Service(chromedriver_path), options=opts)
+    crawl_state.update(project_name, state_builds)
+    crawl_state.save()
+    return {
+        "project": project_name,
+        "total_buttons": len(history),
+        "processed": number
+    }
+
+
+def fetch_rendered_page_and_done(chromedriver_path, url, step, driver=None, feed_projects=None,
+                                 incremental=False, on_log_url=None):
+    """处理单个项目（见 _fetch_rendered_page_and_done），并记录整个项目的耗时事件"""
+    with timed_phase("project", project=project_name_from_url(url)) as event:
+        result = _fetch_rendered_page_and_done(chromedriver_path, url, step, driver, feed_projects,
+                                               incremental, on_log_url)
+        event["ok"] = result is not None
+        if result:
+            event["processed"] = result["processed"]
+        return result
+
+
+def _fetch_rendered_page_and_done(chromedriver_path, url, step, driver=None, feed_projects=None,
+                                  incremental=False, on_log_url=None):
+    """
+    增加了绿色按钮检测和全失败兜底逻辑
+    传入 driver 时（浏览器池中的常驻浏览器）直接复用，不负责关闭
+    传入 feed_projects（状态 JSON 解析结果）且其中包含该项目时，不启动浏览器直接按状态数据处理
+    incremental=True 时构建历史与上次抓取相比没有变化则不再点击按钮和下载
+    传入 on_log_url(日志URL, 保存文件名) 时每找到一个日志立即回调，本函数不再下载，
+    也不更新抓取状态：日志全部找到时结果中带有 "crawl_builds"，由调用方在下载成功后记录
+    """
+    project_name = project_name_from_url(url)
+    if feed_projects and project_name in feed_projects:
+        try:
+            return process_project_from_feed(url, feed_projects[project_name], incremental, on_log_url)
+        except Exception as e:
+            print(f"❌ 发生错误: {str(e)}")
+            append_line("wrong_url_list.txt", url)
+            return None
+
+    own_driver = driver is None
+    if own_driver:
+        driver = create_chrome_driver(chromedriver_path, enable_gpu=True, window_size="1200,900")
+    else:
+        # 同一文档内只改 # 不会重新加载页面，先跳到空白页清掉上一个项目的状态
+        driver.get("about:blank")
     try:
-        driver.get(url)
         print(f"🌐 访问URL: {url}")
 
-        WebDriverWait(driver, 100).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "build-status"))
-        )
+        # 等待 build-status 渲染完毕且构建历史按钮数量稳定
+        open_project_page(driver, url)
         print("✅ 主组件已加载")
-        time.sleep(20)
-
-        expand_shadow_dom(driver)
-
-        # 1. 提取绿色按钮信息 (Last Successful Build)
-        green_btn_info = driver.execute_script("""
-            const shadow = document.querySelector('build-status').shadowRoot;
-            const btn = shadow.querySelector('paper-button.green');
-            return btn ? { exists: true, text: btn.textContent.trim() } : { exists: false };
-        """)
-
-        # 2. 获取 Build History 按钮
-        buttons = driver.find_elements(By.CSS_SELECTOR, "div.buildHistory paper-button")
-
-        ts_pattern = re.compile(r"\d{4}/\d{1,2}/\d{1,2}\s*\d{1,2}:\d{2}:\d{2}")
-        timestamps = []
-        for btn in buttons:
-            m = ts_pattern.search(btn.text)
-            timestamps.append(m.group() if m else "unknown_time")
-
-        note = []
-        for btn in buttons:
-            outer_html = btn.get_attribute("outerHTML")
-            if 'icon="icons:done"' in outer_html:
-                note.append(1)
-            elif 'icon="icons:error"' in outer_html:
-                note.append(0)
-            else:
-                note.append(-1)
 
-        # 3. 逻辑计算：生成 mark 数组 (重复过滤 + 全失败兜底)
-        has_success_in_history = (1 in note)
-        mark = []
-        number = 0
-        for i in range(len(note)):
-            # 兜底规则：如果历史记录中完全没有成功状态，则第一个按钮 (#0) 强制保留
-            if i == 0 and not has_success_in_history:
-                mark.append(note[i])
-                number += 1
-                continue
+        # 1~2. 一次脚本调用取回绿色按钮 (Last Successful Build) 与全部 Build History 按钮信息
+        with timed_phase("history", project=project_name) as event:
+            entries = driver.execute_script(HISTORY_ENTRIES_JS) or []
+            event["entries"] = len(entries)
+        buttons, timestamps, note, green_ts, known_hrefs = parse_history_entries(entries)
 
-            # 原始去重逻辑
-            if len(note) == 1:
-                mark.append(note[i]);
-                number += 1
-            elif i == 0 and i + 1 < len(note) and note[i] == note[i + 1]:
-                mark.append(3)
-            elif i == len(note) - 1 and i - 1 >= 0 and note[i] == note[i - 1]:
-                mark.append(3)
-            elif i - 1 >= 0 and i + 1 < len(note) and note[i] == note[i - 1] and note[i] == note[i + 1]:
-                mark.append(3)
-            else:
-                mark.append(note[i]);
-                number += 1
+        # 3. 逻辑计算：生成 mark 数组 (重复过滤 + 全失败兜底)
+        mark, number = compute_mark(note)
 
         # 4. 组合数据并注入绿色按钮任务
         combined = [(i, timestamps[i], note[i]) for i in range(len(timestamps))]
 
-        if green_btn_info['exists']:
-            m_green = ts_pattern.search(green_btn_info['text'])
-            green_ts = m_green.group() if m_green else "unknown_time"
+        if green_ts is not None:
             # 插入到任务队列首位，使用特殊索引 "GREEN"
             combined.insert(0, ("GREEN", green_ts, 1))
             mark.insert(0, 1)  # 强制执行
@@ -507,21 +968,90 @@ def fetch_rendered_page_and_done(chromedriver_path, url, step):
             print(f"✨ 已捕获最后成功构建时间: {green_ts}")
 
         print(f"📊 构建状态统计: 成功={note.count(1)}, 失败={note.count(0)}, 未知={note.count(-1)}")
-        driver.quit()
+
+        # 日志已在本地的构建不再点击
+        cache = get_log_cache()
+        cached_count = 0
+        for j, (index, timestamp, status) in enumerate(combined):
+            if mark[j] != 3 and cache.cached_build(project_name, timestamp, status):
+                mark[j] = 3
+                cached_count += 1
+        if cached_count:
+            print(f"⏭️ {cached_count} 个构建的日志已缓存，跳过点击")
 
         if number != 0:
-            with open("target_url_list.txt", "a", encoding="utf-8") as fi:
-                fi.write(url + "\n")
+            append_line("target_url_list.txt", url)
+
+        state_builds = [{"timestamp": timestamps[i], "status": note[i]} for i in range(len(timestamps))]
+        crawl_state = get_crawl_state()
+        if incremental and not crawl_state.is_changed(project_name, state_builds):
+            print("⏭️ 构建历史与上次抓取相同，跳过")
+            return {
+                "project": project_name,
+                "total_buttons": len(buttons),
+                "processed": 0
+            }
 
-            # 执行抓取
-            log_url_list, date_and_state_list = extract_build_log_urls(chromedriver_path, url, combined, mark)
+        # 按钮上已经带有日志链接的构建不需要点击
+        pre_urls = []
+        pre_names = []
+        for j, (index, timestamp, status) in enumerate(combined):
+            href = known_hrefs.get(index)
+            if mark[j] != 3 and href:
+                log_url = urljoin(driver.current_url, href)
+                print(f"🔗 找到日志文件URL: {log_url}")
+                cache.note_build(project_name, timestamp, status, log_uuid(log_url))
+                pre_urls.append(log_url)
+                pre_names.append(date_and_state(timestamp, status))
+                mark[j] = 3
+                if on_log_url:
+                    on_log_url(log_url, pre_names[-1])
+
+        all_done = True
+        to_click = len([m for m in mark if m != 3])
+        if to_click > 0 or pre_urls:
+            # 执行抓取：页面已经加载好，直接复用当前浏览器依次点击按钮
+            log_url_list, date_and_state_list = [], []
+            if to_click > 0:
+                log_url_list, date_and_state_list = extract_build_log_urls(
+                    chromedriver_path, url, combined, mark, driver=driver, on_log_url=on_log_url
+                )
+            log_url_list = pre_urls + log_url_list
+            date_and_state_list = pre_names + date_and_state_list
+            # 按钮处理完毕，下载前先释放浏览器
+            if own_driver:
+                driver.quit()
+                driver = None
+
+            all_done = len(log_url_list) == to_click + len(pre_urls)
+            if on_log_url:
+                # 日志已交给调用方下载
+                return {
+                    "project": project_name,
+                    "total_buttons": len(buttons),
+                    "processed": number,
+                    "crawl_builds": state_builds if all_done else None
+                }
 
             # 下载日志
-            for i, log_url in enumerate(log_url_list):
-                download_with_urllib(log_url, date_and_state_list[i], project_name, 0)
+            results = download_logs(log_url_list, date_and_state_list, project_name)
+            all_done = all_done and all(results)
 
             print("✅ 所有构建日志处理完成")
 
+        if on_log_url:
+            return {
+                "project": project_name,
+                "total_buttons": len(buttons),
+                "processed": number,
+                "crawl_builds": state_builds
+            }
+
+        # 只有全部日志都拿到时才记录抓取状态，否则下次仍会重新处理
+        if all_done:
+            crawl_state.update(project_name, state_builds)
+            crawl_state.save()
+
         return {
             "project": project_name,
             "total_buttons": len(buttons),
@@ -530,22 +1060,21 @@ def fetch_rendered_page_and_done(chromedriver_path, url, step):
 
     except Exception as e:
         print(f"❌ 发生错误: {str(e)}")
-        with open("wrong_url_list.txt", "a", encoding="utf-8") as fi:
-            fi.write(url + "\n")
+        append_line("wrong_url_list.txt", url)
         return None
     finally:
-        if 'driver' in locals() and driver:
+        if own_driver and driver:
             driver.quit()
-        print("🚪 浏览器已关闭")
+            print("🚪 浏览器已关闭")
 
 
-def run_fuzz_log_task(chromedriver_path):
-    """包装 main 函数，使其可以被 schedule 调用，并处理可能的异常。"""
+def run_fuzz_log_task(chromedriver_path, **options):
+    """包装 main 函数，使其可以被 schedule 调用，并处理可能的异常；options 原样传给 main"""
     try:
         print(f"\n" + "=" * 80)
         print(f"🚀 开始执行 Fuzz Log 抓取任务 (当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})...")
         print(f"=" * 80 + "\n")
-        main(chromedriver_path)
+        main(chromedriver_path, **options)
         print(f"\n" + "=" * 80)
         print(f"✅ Fuzz Log 抓取任务执行完成。")
         print(f"=" * 80 + "\n")
@@ -557,73 +1086,195 @@ def run_fuzz_log_task(chromedriver_path):
         traceback.print_exc()
 
 
-def main(chromedriver_path):
-    """主函数"""
+def read_url_list(path):
+    """读取列表文件中的非空URL"""
+    with open(path, "r", encoding="utf-8") as fin:
+        return [line.strip() for line in fin if line.strip()]
+
+
+def print_project_result(result):
+    if result:
+        print(f"🎉 项目 '{result['project']}' 处理完成")
+        print(f"  总按钮数: {result['total_buttons']}")
+        print(f"  处理按钮数: {result['processed']}")
+
+
+def process_project_urls(chromedriver_path, urls, workers=1, max_total_rss_mb=4096, feed_projects=None,
+                         incremental=False):
+    """
+    处理一批项目URL：workers=1 时逐个处理，
+    workers>1 时交给常驻浏览器池并发处理，浏览器总内存不超过 max_total_rss_mb；
+    状态数据中已包含的项目直接处理，不占用浏览器。
+    incremental=True 时只处理构建历史有变化的项目：有状态数据时根本不打开这些项目，
+    否则打开页面读取按钮后再决定是否点击
+    """
+    # duplicate_removal 会把上次的 target_url_list.txt 追加进来，列表中常有重复；
+    # 同一项目只处理一次，也避免两个浏览器同时写同一个日志的 .part 文件
+    unique_urls = list(dict.fromkeys(urls))
+    if len(unique_urls) < len(urls):
+        print(f"🧹 去掉 {len(urls) - len(unique_urls)} 个重复的项目URL")
+        urls = unique_urls
+
+    if feed_projects:
+        browser_urls = []
+        for url in urls:
+            project_name = project_name_from_url(url)
+            if project_name in feed_projects:
+                print_project_result(fetch_rendered_page_and_done(chromedriver_path, url, 0,
+                                                                  feed_projects=feed_projects,
+                                                                  incremental=incremental))
+            else:
+                browser_urls.append(url)
+        urls = browser_urls
+        if not urls:
+            return
+
+    if workers <= 1:
+        for url in urls:
+            print_project_result(fetch_rendered_page_and_done(chromedriver_path, url, 0, incremental=incremental))
+        return
+
+    pool = BrowserPool(
+        lambda: create_chrome_driver(chromedriver_path, enable_gpu=True, window_size="1200,900"),
+        workers=workers,
+        max_total_rss_mb=max_total_rss_mb,
+    )
+    results = pool.run(
+        urls,
+        lambda url, driver: fetch_rendered_page_and_done(chromedriver_path, url, 0, driver=driver,
+                                                         incremental=incremental),
+    )
+    for result in results:
+        print_project_result(result)
+
+
+def load_feed_or_fallback(feed_url):
+    """获取状态数据，失败时返回 None 以回退到 Selenium 路径"""
+    try:
+        with timed_phase("status_feed"):
+            feed_projects = load_status_feed(feed_url, LOG_HOST_URL)
+        print(f"📡 已从状态数据获取 {len(feed_projects)} 个项目: {feed_url}")
+        return feed_projects
+    except StatusFeedError as e:
+        print(f"⚠️ {str(e)}，回退到浏览器渲染方式")
+        return None
+
+
+def discover_projects(chromedriver_path, backend="selenium", feed_url=STATUS_FEED_URL):
+    """
+    项目发现：获取最近一次构建失败的项目写入 project_url_list.txt，并合并 target_url_list.txt；
+    返回状态数据解析结果（未使用或不可用时为 None），供后续处理项目时复用
+    """
+    start = time.perf_counter()
+    # 获取网页html内容
+    feed_projects = load_feed_or_fallback(feed_url) if backend == "feed" else None
+    if feed_projects is not None:
+        # 获取所有build失败的项目，不需要浏览器
+        snippets_list = fetch_and_extract(chromedriver_path, feed_projects=feed_projects)
+    else:
+        # 首页只渲染一次，同时用于存档和失败项目提取
+        rendered_html = fetch_index_snapshot(chromedriver_path)
+        fetch_rendered_page(chromedriver_path, rendered_html=rendered_html)
+        # 获取所有build失败的项目的URL
+        snippets_list = fetch_and_extract(chromedriver_path, rendered_html=rendered_html)
+    # 获取各个构件失败项目的URL
+    print("抽取到的所有项目拼接url：")
+    project_urls = []
+    base_url = INDEX_URL + "#"
+    for idx, snippet in enumerate(snippets_list, 1):
+        project_urls.append(base_url + snippet)
+        print(f"{idx}: {base_url + snippet}\n")
+    with open("project_url_list.txt", "w", encoding="utf-8") as f:
+        for url in project_urls:
+            f.write(url + "\n")
+    print(f"✅ 已将 {len(project_urls)} 条 URL（保存到 project_url_list.txt")
+    result = duplicate_removal('target_url_list.txt', 'project_url_list.txt')
+    if result > 0:
+        print(f"将{result} 个项目 url 追加进 project_url_list.txt")
+    emit_event("phase", phase="discovery", duration=round(time.perf_counter() - start, 4), ok=True,
+               backend="feed" if feed_projects is not None else "selenium", projects=len(project_urls))
+    return feed_projects
+
+
+def main(chromedriver_path, workers=1, max_total_rss_mb=4096, backend="selenium", feed_url=STATUS_FEED_URL,
+         incremental=False, pipeline=False, log_compression=LOG_COMPRESSION):
+    """
+    主函数
+    workers: 并发处理项目的常驻浏览器数量
+    max_total_rss_mb: 浏览器池 RSS 总量上限 (MB)
+    backend: 项目发现方式，"selenium" 渲染首页，"feed" 直接读取状态 JSON（不可用时自动回退）
+    feed_url: backend="feed" 时使用的状态 JSON 地址
+    incremental: 只处理构建历史与上次抓取相比有变化的项目（上次失败的项目总会重试）
+    pipeline: 发现、提取、下载三个阶段以流水线方式并行执行（见 pipeline.py），
+              找到第一个日志URL就开始下载；此模式下不使用浏览器池的内存上限
+    log_compression: 新下载日志的保存方式，None 按原文保存，"gzip" / "zstd" 压缩保存
+    """
+    global LOG_COMPRESSION
+    LOG_COMPRESSION = check_compression(log_compression)
+
     # 创建日志文件名（包含时间戳）
     run_log_dir = "logs"
     os.makedirs(run_log_dir, exist_ok=True)
-    log_filename = os.path.join(run_log_dir, f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    log_filename = os.path.join(run_log_dir, f"log_{run_id}.txt")
+    # 与人读日志并列的结构化事件日志，见 events.py
+    start_event_log(os.path.join(run_log_dir, f"events_{run_id}.jsonl"), run_id)
+    # 按阶段 / 项目汇总耗时，运行结束时打印并保存为 metrics_<时间戳>.json
+    metrics = RunMetrics(run_id)
+    metrics.start()
+    emit_event("run_start", backend=backend, workers=workers, incremental=incremental, pipeline=pipeline)
+    run_start = time.perf_counter()
+    run_error = None
+
+    # 每次运行重新开始计算重试预算
+    RETRY_BUDGET.reset()
 
     # 使用Tee类重定向输出
     with Tee(log_filename) as tee:
         try:
             # 在这里调用您的核心功能
-            # 获取网页html内容
-            output_path = "oss_fuzz_index_with_build_status.html"
-            fetch_rendered_page(chromedriver_path, output_path)
-            # 获取所有build失败的项目的URL
-            snippets_list = fetch_and_extract(chromedriver_path)
-            # 获取各个构件失败项目的URL
-            print("抽取到的所有项目拼接url：")
-            project_urls = []
-            base_url = "https://oss-fuzz-build-logs.storage.googleapis.com/index.html#"
-            for idx, snippet in enumerate(snippets_list, 1):
-                project_urls.append(base_url + snippet)
-                print(f"{idx}: {base_url + snippet}\n")
-            with open("project_url_list.txt", "w", encoding="utf-8") as f:
-                for url in project_urls:
-                    f.write(url + "\n")
-            print(f"✅ 已将 {len(project_urls)} 条 URL（保存到 project_url_list.txt")
-            result = duplicate_removal('target_url_list.txt', 'project_url_list.txt')
-            if result > 0:
-                print(f"将{result} 个项目 url 追加进 project_url_list.txt")
-            # 获取并下载日志到本地
-            with open("project_url_list.txt", "r", encoding="utf-8") as fin:
-                for line in fin:
-                    url = line.strip()
-                    if not url:
-                        continue
-                    result = fetch_rendered_page_and_done(chromedriver_path, url, 0)
-                    if result:
-                        print(f"🎉 项目 '{result['project']}' 处理完成")
-                        print(f"  总按钮数: {result['total_buttons']}")
-                        print(f"  处理按钮数: {result['processed']}")
-            with open("wrong_url_list.txt", "r", encoding="utf-8") as fin:
-                for line in fin:
-                    url = line.strip()
-                    if not url:
-                        continue
-                    result = fetch_rendered_page_and_done(chromedriver_path, url, 0)
-                    if result:
-                        print(f"🎉 项目 '{result['project']}' 处理完成")
-                        print(f"  总按钮数: {result['total_buttons']}")
-                        print(f"  处理按钮数: {result['processed']}")
-            # 清空文件
-            with open("wrong_url_list.txt", 'w', encoding='utf-8') as input_file:
-                input_file.write('')
+            if pipeline:
+                from pipeline import run_pipeline
+                # 把本模块传给流水线：作为脚本运行时本模块是 __main__，流水线若自行 import all_log_obtain
+                # 会得到另一份全局状态（重试预算、日志索引、站点地址），上面的重置与 use_site 都不会生效
+                run_pipeline(chromedriver_path, workers, backend=backend, feed_url=feed_url,
+                             incremental=incremental, crawler=sys.modules[__name__])
+            else:
+                feed_projects = discover_projects(chromedriver_path, backend, feed_url)
+                # 获取并下载日志到本地
+                process_project_urls(chromedriver_path, read_url_list("project_url_list.txt"),
+                                     workers, max_total_rss_mb, feed_projects, incremental)
+                process_project_urls(chromedriver_path, read_url_list("wrong_url_list.txt"),
+                                     workers, max_total_rss_mb, feed_projects)
+                # 清空文件
+                with open("wrong_url_list.txt", 'w', encoding='utf-8') as input_file:
+                    input_file.write('')
         except Exception as e:
             # 捕获并记录所有未处理异常.
             print(f"❌ 发生未处理的异常: {str(e)}")
             import traceback
             traceback.print_exc(file=sys.stderr)
+            run_error = type(e).__name__
             raise  # 重新抛出异常以便在finally块中处理
         finally:
+            emit_event("run_end", duration=round(time.perf_counter() - run_start, 3), ok=run_error is None,
+                       error=run_error, retries_used=RETRY_BUDGET.used)
+            stop_event_log()
+            # 两次定时运行之间相隔很久，空闲的 keep-alive 连接不再保留
+            default_pool.close_all()
+            metrics.stop()
+            metrics.report()
+            try:
+                metrics.save(os.path.join(run_log_dir, f"metrics_{run_id}.json"))
+            except OSError as e:
+                print(f"⚠️ 保存运行统计失败: {str(e)}")
             # 确保所有输出都被刷新
             tee.flush()
             print("✅ 日志已保存到:", log_filename)
 
 
 if __name__ == "__main__":
+    import argparse
 
     # 获取当前脚本所在的目录,构建相对路径
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -634,11 +1285,38 @@ if __name__ == "__main__":
         "chromedriver"
     )
 
+    parser = argparse.ArgumentParser(description="抓取 OSS-Fuzz 构建失败项目的日志")
+    parser.add_argument("--chromedriver", default=chromedriver_path)
+    parser.add_argument("--backend", choices=("selenium", "feed"), default="selenium",
+                        help="项目发现方式：selenium 渲染首页，feed 直接读取状态 JSON（不可用时自动回退）")
+    parser.add_argument("--feed-url", default=STATUS_FEED_URL, help="--backend feed 时使用的状态 JSON 地址")
+    parser.add_argument("--workers", type=int, default=1, help="并发处理项目的常驻浏览器数量")
+    parser.add_argument("--max-rss-mb", type=int, default=4096, help="浏览器池 RSS 总量上限 (MB)")
+    parser.add_argument("--incremental", action="store_true", help="只处理构建历史有变化的项目")
+    parser.add_argument("--pipeline", action="store_true", help="发现、提取、下载三个阶段以流水线方式并行执行")
+    parser.add_argument("--log-compression", choices=("gzip", "zstd"), default=LOG_COMPRESSION,
+                        help="新下载的日志压缩保存（默认按原文保存，读取见 log_store.open_log）")
+    args = parser.parse_args()
+    try:
+        check_compression(args.log_compression)
+    except ValueError as e:
+        parser.error(str(e))
+    chromedriver_path = args.chromedriver
+    run_options = {
+        "workers": args.workers,
+        "max_total_rss_mb": args.max_rss_mb,
+        "backend": args.backend,
+        "feed_url": args.feed_url,
+        "incremental": args.incremental,
+        "pipeline": args.pipeline,
+        "log_compression": args.log_compression,
+    }
+
     print(schedule.__file__)  # 检查 schedule 模块
     print(f"配置的ChromeDriver路径: {chromedriver_path}")
-    main(chromedriver_path)
-    # schedule.every().day.at("01:00").do(run_fuzz_log_task, chromedriver_path)
-    # schedule.every().day.at("23:00").do(run_fuzz_log_task, chromedriver_path)
+    main(chromedriver_path, **run_options)
+    # schedule.every().day.at("01:00").do(run_fuzz_log_task, chromedriver_path, **run_options)
+    # schedule.every().day.at("23:00").do(run_fuzz_log_task, chromedriver_path, **run_options)
 
     print("\n" + "#" * 80)
     print("Python Fuzz Log 抓取调度器已启动。")
@@ -0,0 +1,458 @@
+"""
+离线性能基准，不访问网络，可在任意 Linux 机器上运行，用于发现性能回退
+用法:
+    python benchmark.py index [--html oss_fuzz_index_with_build_status.html | index_snapshots/index_<时间戳>.html.gz]
+    python benchmark.py marks [--html 展平后的项目页面.html]      解析构建历史按钮并计算 mark
+    python benchmark.py links [--html 展平后的项目页面.html]      从项目页面 HTML 中提取日志链接
+    python benchmark.py download [--count 40 --size-kb 512 --workers 4 --latency-ms 20 --fixtures 日志目录]
+    python benchmark.py all [--json results.json]                 依次运行以上全部基准
+index 之外的基准会导入 all_log_obtain，需要与抓取时相同的依赖（selenium / bs4 / schedule），但不需要浏览器
+"""
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from index_extractor import extract_error_projects
+
+
+def legacy_extract_errors(html):
+    """旧版 extract_between_markers 的正则实现，仅作为基准对照"""
+    pattern = re.compile(
+        r'<iron-icon[^>]*icon=["\']icons:error["\'][\s\S]*?</iron-icon>'
+        r'[\s\S]*?'
+        r'([^<\s][^<]+?)\s*'
+        r'</div>',
+        re.IGNORECASE
+    )
+    return [m.split('>')[-1].strip() for m in pattern.findall(html)]
+
+
+def shared_div_html(n_icons):
+    """n_icons 个图标共用同一个 </div>，用来检验线性扫描不会对同一段反复查找"""
+    return ("<div>" + '<iron-icon icon="icons:menu"></iron-icon>' * (n_icons - 1)
+            + '<iron-icon icon="icons:error"></iron-icon> curl</div>')
+
+
+# 两种实现必须给出相同结果的边界情况：项目列表前有不属于任何项目行的图标（工具栏、图例），
+# 以及许多图标共用同一个 </div>
+INDEX_EDGE_CASES = [
+    '<iron-icon icon="icons:menu"></iron-icon><span>x</span>'
+    '<div class=project><iron-icon icon="icons:error"></iron-icon> curl</div>'
+    '<div class=project><iron-icon icon="icons:error"></iron-icon> zlib</div>',
+    '<div class=toolbar><iron-icon icon="icons:menu"></iron-icon>'
+    '<div class=project><iron-icon icon="icons:done"></iron-icon> libpng</div>'
+    '<div class=project><iron-icon icon="icons:error"></iron-icon> openssl</div></div>',
+    shared_div_html(50),
+]
+
+
+def synthetic_index_html(n_projects, error_ratio=0.1, seed=0):
+    """
+    生成与展平后首页结构相同的 HTML：工具栏图标之后，每个项目一个 <div>，内含状态图标与项目名
+    """
+    rng = random.Random(seed)
+    # 展平后的组件副本里会带上组件自身的 <style> 文本
+    style = "".join(f".style-scope.iron-icon-{k} {{ display: inline-flex; fill: currentcolor; }}\n"
+                    for k in range(12))
+    parts = ['<html><body><build-status><div class="__shadow_contents">',
+             '<app-toolbar><iron-icon icon="icons:menu"></iron-icon><span>OSS-Fuzz</span></app-toolbar>']
+    for i in range(n_projects):
+        icon = "icons:error" if rng.random() < error_ratio else "icons:done"
+        parts.append(
+            f'<div class="project"><iron-icon icon="{icon}" class="style-scope build-status">'
+            f'<div class="__shadow_contents"><style>{style}</style>'
+            f'<svg viewBox="0 0 24 24"><g><path d="M12 2C6.48 2 2 6.48 2 12s4.48'
+            f' 10 10 10 10-4.48 10-10S17.52 2 12 2z"></path></g></svg></div></iron-icon>'
+            f'<dom-if style="display: none;"><template is="dom-if"></template></dom-if>\n'
+            f'                  project-{i}</div>\n'
+        )
+    parts.append('</div></build-status></body></html>')
+    return "".join(parts)
+
+
+def _time_call(func, arg, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _read_html(html_path):
+    """读取保存的页面 HTML（支持 .gz），文件不存在时返回 None"""
+    if not html_path or not os.path.exists(html_path):
+        if html_path:
+            print(f"  ⚠️ 未找到 {html_path}，只运行合成页面基准")
+        return None
+    opener = gzip.open if html_path.endswith(".gz") else open
+    with opener(html_path, "rt", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def bench_index(html_path=None, sizes=(1000, 2000, 4000, 8000, 16000), repeat=3):
+    """对比旧正则与线性扫描在首页 HTML 上的耗时，并观察随页面增大的增长趋势"""
+    print("📐 失败项目提取基准 (取多次运行的最短耗时)")
+    results = {}
+    for case in INDEX_EDGE_CASES:
+        assert legacy_extract_errors(case) == extract_error_projects(case), f"两种实现的提取结果不一致: {case}"
+    html = _read_html(html_path)
+    if html is not None:
+        legacy_time, legacy = _time_call(legacy_extract_errors, html, repeat)
+        linear_time, linear = _time_call(extract_error_projects, html, repeat)
+        print(f"  {html_path}: {len(html) / 1024 / 1024:.1f} MB")
+        print(f"    旧正则: {legacy_time * 1000:9.1f} ms  ({len(legacy)} 个失败项目)")
+        print(f"    线性扫描: {linear_time * 1000:9.1f} ms  ({len(linear)} 个失败项目)")
+        if [n for n in legacy if n] != linear:
+            print("    ⚠️ 两种实现的提取结果不一致")
+        results["saved_ms"] = linear_time * 1000
+
+    print(f"  {'项目数':>8} {'大小(KB)':>10} {'旧正则(ms)':>12} {'线性扫描(ms)':>14} {'线性 ns/字节':>14} "
+          f"{'同一 div(ms)':>14}")
+    for n in sizes:
+        html = synthetic_index_html(n)
+        legacy_time, legacy = _time_call(legacy_extract_errors, html, repeat)
+        linear_time, linear = _time_call(extract_error_projects, html, repeat)
+        assert legacy == linear, "两种实现的提取结果不一致"
+        # 同样数量的图标全部挤在一个 <div> 中，耗时也应随 n 线性增长
+        shared_time, shared = _time_call(extract_error_projects, shared_div_html(n), repeat)
+        assert shared == ["curl"], "同一 div 中的图标提取结果不正确"
+        print(f"  {n:>8} {len(html) / 1024:>10.0f} {legacy_time * 1000:>12.2f} {linear_time * 1000:>14.2f} "
+              f"{linear_time * 1e9 / len(html):>14.2f} {shared_time * 1000:>14.2f}")
+        results[f"synthetic_{n}_ms"] = linear_time * 1000
+        results[f"shared_div_{n}_ms"] = shared_time * 1000
+    return results
+
+
+# —— 项目页面：构建历史按钮与日志链接 ——
+
+def synthetic_project_html(n_buttons, seed=0, with_log_link=True):
+    """
+    生成与展平后项目页面结构相同的 HTML：绿色按钮 + div.buildHistory 中的 n_buttons 个历史按钮，
+    每个按钮带状态图标与构建时间，日志面板中有一个 /log-<uuid>.txt 链接
+    """
+    rng = random.Random(seed)
+    style = "".join(f".style-scope.paper-button-{k} {{ display: inline-flex; }}\n" for k in range(12))
+    parts = ['<html><body><build-status><div class="__shadow_contents">',
+             '<paper-button class="green style-scope build-status">'
+             '<iron-icon icon="icons:done"></iron-icon> Last successful build 2025/10/01 01:02:03</paper-button>',
+             '<div class="buildHistory style-scope build-status">']
+    # 状态成段出现，与真实项目的构建历史相似
+    status = "icons:error"
+    for i in range(n_buttons):
+        if rng.random() < 0.2:
+            status = "icons:done" if status == "icons:error" else "icons:error"
+        day = 1 + i % 28
+        parts.append(
+            f'<paper-button class="style-scope build-status"><iron-icon icon="{status}" class="style-scope">'
+            f'<div class="__shadow_contents"><style>{style}</style><svg viewBox="0 0 24 24"><g><path d="M9 16.2L4.8'
+            f' 12l-1.4 1.4L9 19 21 7l-1.4-1.4L9 16.2z"></path></g></svg></div></iron-icon>'
+            f' 2025/09/{day:02d} {i % 24:02d}:{i % 60:02d}:00</paper-button>\n'
+        )
+    parts.append('</div><div class="logPanel style-scope build-status">')
+    if with_log_link:
+        parts.append(f'<a href="/log-{rng.getrandbits(128):032x}.txt" class="style-scope">build log</a>')
+    parts.append('</div></div></build-status></body></html>')
+    return "".join(parts)
+
+
+class HistoryEntriesParser(HTMLParser):
+    """
+    从展平后的项目页面 HTML 中读出与 HISTORY_ENTRIES_JS 返回值相同结构的按钮条目，
+    离线时代替浏览器中的脚本调用
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.entries = []
+        self._current = None
+        self._text = []
+        self._history_index = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "paper-button" and self._current is None:
+            green = "green" in (attrs.get("class") or "").split()
+            self._current = {"index": "GREEN" if green else self._history_index, "icon": None,
+                             "green": green, "log_href": None}
+            self._text = []
+            if not green:
+                self._history_index += 1
+        elif self._current is not None:
+            if tag == "iron-icon" and attrs.get("icon") and not self._current["icon"]:
+                self._current["icon"] = attrs["icon"]
+            elif tag == "a":
+                href = attrs.get("href") or ""
+                if href.startswith("/log-") and href.endswith(".txt"):
+                    self._current["log_href"] = href
+
+    def handle_endtag(self, tag):
+        if tag == "paper-button" and self._current is not None:
+            self._current["text"] = re.sub(r"\s+", " ", "".join(self._text)).strip()
+            self.entries.append(self._current)
+            self._current = None
+
+    def handle_data(self, data):
+        if self._current is not None:
+            self._text.append(data)
+
+
+def history_entries_from_html(html):
+    parser = HistoryEntriesParser()
+    parser.feed(html)
+    parser.close()
+    return parser.entries
+
+
+def bench_marks(html_path=None, sizes=(20, 100, 500, 2000), repeat=5):
+    """
+    按钮条目解析 (parse_history_entries) + mark 计算：保存的项目页面与不同历史长度的合成页面；
+    从 HTML 读出按钮条目（浏览器中由 HISTORY_ENTRIES_JS 完成）只是准备数据，不计入耗时
+    """
+    import all_log_obtain as crawler
+    print("🧮 构建历史解析与 mark 计算基准 (取多次运行的最短耗时)")
+    results = {}
+    pages = []
+    html = _read_html(html_path)
+    if html is not None:
+        pages.append((html_path, html))
+    pages += [(f"合成 {n} 个按钮", synthetic_project_html(n)) for n in sizes]
+
+    print(f"  {'页面':<24} {'按钮数':>7} {'需点击':>7} {'解析(ms)':>10} {'mark(ms)':>10} {'us/按钮':>9}")
+    for name, html in pages:
+        entries = history_entries_from_html(html)
+        parse_time, parsed = _time_call(crawler.parse_history_entries, entries, repeat)
+        note = parsed[2]
+        mark_time, (mark, number) = _time_call(crawler.compute_mark, note, repeat)
+        per_button = (parse_time + mark_time) * 1e6 / max(len(entries), 1)
+        print(f"  {name:<24} {len(entries):>7} {number:>7} {parse_time * 1000:>10.2f} "
+              f"{mark_time * 1000:>10.3f} {per_button:>9.1f}")
+        results[name] = {"buttons": len(entries), "parse_ms": parse_time * 1000, "mark_ms": mark_time * 1000}
+    return results
+
+
+def bench_links(html_path=None, sizes=(20, 100, 500, 2000), repeat=5):
+    """用 BeautifulSoup 从展平后的项目页面中提取日志链接（link_extraction="soup" 的解析部分）"""
+    import all_log_obtain as crawler
+    print("🔗 日志链接提取基准 (find_log_url，取多次运行的最短耗时)")
+    results = {}
+    pages = []
+    html = _read_html(html_path)
+    if html is not None:
+        pages.append((html_path, html))
+    pages += [(f"合成 {n} 个按钮", synthetic_project_html(n, seed=n)) for n in sizes]
+
+    print(f"  {'页面':<24} {'大小(KB)':>10} {'耗时(ms)':>10} {'MB/s':>8}  链接")
+    for name, html in pages:
+        elapsed, log_url = _time_call(crawler.find_log_url, html, repeat)
+        print(f"  {name:<24} {len(html) / 1024:>10.0f} {elapsed * 1000:>10.2f} "
+              f"{len(html) / 1024 / 1024 / max(elapsed, 1e-9):>8.1f}  {log_url or '未找到'}")
+        results[name] = {"kb": len(html) / 1024, "ms": elapsed * 1000, "found": bool(log_url)}
+    return results
+
+
+# —— 日志下载：本地 HTTP 服务器提供日志样本 ——
+
+def synthetic_log(size, seed=0):
+    """生成大小约为 size 字节、形似 Cloud Build 输出的日志文本"""
+    rng = random.Random(seed)
+    steps = ["git clone", "compile-libfuzzer-address-x86_64", "compile-afl-address-x86_64",
+             "build-check-libfuzzer-address-x86_64", "upload"]
+    lines = [f"starting build \"{rng.getrandbits(128):032x}\"\n"]
+    total = len(lines[0])
+    n = 0
+    while total < size:
+        step = rng.randrange(len(steps))
+        line = (f"Step #{step} - \"{steps[step]}\": [{n:6d}/{rng.randrange(1, 99999):5d}] "
+                f"Compiling src/module_{rng.randrange(500)}.c -O1 -fsanitize=address "
+                f"-fsanitize-address-use-after-scope -fsanitize=fuzzer-no-link\n")
+        lines.append(line)
+        total += len(line)
+        n += 1
+    return "".join(lines)[:size].encode("utf-8")
+
+
+class FixtureLogHandler(BaseHTTPRequestHandler):
+    """按路径返回 server.logs 中的日志内容，支持 keep-alive；server.latency 秒模拟网络往返"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        body = self.server.logs.get(self.path.split("?")[0])
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", f'"{hash(body) & 0xffffffff:08x}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def fixture_log_server(logs, latency=0.0):
+    """在 127.0.0.1 的随机端口上提供 {"/log-<uuid>.txt": 内容} 中的日志，产出服务器根URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureLogHandler)
+    server.daemon_threads = True
+    server.logs = logs
+    server.latency = latency
+    thread = threading.Thread(target=server.serve_forever, name="fixture-log-server", daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def load_fixture_logs(count, size, fixtures_dir=None):
+    """日志样本：fixtures_dir 中已下载的日志（支持压缩 / .ref 条目），否则生成 count 个合成日志"""
+    from log_store import read_log
+    bodies = []
+    if fixtures_dir:
+        for root, _, names in os.walk(fixtures_dir):
+            for name in sorted(names):
+                if name.endswith((".json", ".part", ".tmp")) or name.startswith("."):
+                    continue
+                bodies.append(read_log(os.path.join(root, name)).encode("utf-8"))
+                if len(bodies) >= count:
+                    break
+            if len(bodies) >= count:
+                break
+        if not bodies:
+            print(f"  ⚠️ {fixtures_dir} 中没有日志，改用合成日志")
+    if not bodies:
+        bodies = [synthetic_log(size, seed=i) for i in range(count)]
+    rng = random.Random(len(bodies))
+    return {f"/log-{rng.getrandbits(128):032x}.txt": body for body in bodies}
+
+
+def _download_round(crawler, base_url, logs, workers):
+    """在临时目录中用 download_logs 下载全部样本一次，返回 (耗时, 成功数, 阶段统计)"""
+    from metrics import RunMetrics
+    log_urls = [base_url + path for path in logs]
+    names = ["2025_10_01 error"] * len(log_urls)
+    cwd = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="log_bench_")
+    metrics = RunMetrics("benchmark")
+    try:
+        os.chdir(work_dir)
+        # 日志索引与 blob 存储都按相对路径 LOG_DIR 创建，每轮换一个空目录重新开始
+        crawler._log_cache = None
+        crawler._blob_store = None
+        metrics.start()
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results = crawler.download_logs(log_urls, names, "benchmark", workers=workers)
+        elapsed = time.perf_counter() - start
+        metrics.stop()
+    finally:
+        os.chdir(cwd)
+        crawler._log_cache = None
+        crawler._blob_store = None
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return elapsed, sum(1 for ok in results if ok), metrics.to_dict()["phases"]
+
+
+def bench_download(count=40, size_kb=512, workers=(1, 4), latency_ms=0.0, fixtures_dir=None):
+    """
+    通过本地 HTTP 服务器用 download_with_urllib（经 download_logs）下载日志样本，
+    报告不同并发数下的总吞吐与单个日志的下载延迟 p50/p95/max
+    """
+    import all_log_obtain as crawler
+    logs = load_fixture_logs(count, size_kb * 1024, fixtures_dir)
+    total = sum(len(body) for body in logs.values())
+    print(f"⬇️ 日志下载基准: {len(logs)} 个日志, 共 {total / 1024 / 1024:.1f} MB, "
+          f"模拟往返延迟 {latency_ms:.0f} ms")
+    results = {}
+    print(f"  {'并发':>4} {'成功':>6} {'总耗时(s)':>10} {'MB/s':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'max(ms)':>9} "
+          f"{'存储p50(ms)':>12}")
+    with fixture_log_server(logs, latency_ms / 1000) as base_url:
+        for n in workers:
+            elapsed, ok, phases = _download_round(crawler, base_url, logs, n)
+            download = phases.get("download", {})
+            store = phases.get("store", {})
+            print(f"  {n:>4} {ok:>6} {elapsed:>10.2f} {total / 1024 / 1024 / max(elapsed, 1e-9):>8.1f} "
+                  f"{download.get('p50', 0) * 1000:>9.1f} {download.get('p95', 0) * 1000:>9.1f} "
+                  f"{download.get('max', 0) * 1000:>9.1f} {store.get('p50', 0) * 1000:>12.1f}")
+            if ok < len(logs):
+                print(f"  ⚠️ {len(logs) - ok} 个日志下载失败")
+            results[f"workers_{n}"] = {
+                "ok": ok,
+                "seconds": elapsed,
+                "mb_per_s": total / 1024 / 1024 / max(elapsed, 1e-9),
+                "p50_ms": download.get("p50", 0) * 1000,
+                "p95_ms": download.get("p95", 0) * 1000,
+                "max_ms": download.get("max", 0) * 1000,
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fuzz 日志抓取离线性能基准")
+    sub = parser.add_subparsers(dest="command")
+    index_parser = sub.add_parser("index", help="首页失败项目提取")
+    index_parser.add_argument("--html", default="oss_fuzz_index_with_build_status.html",
+                              help="已保存的渲染后首页 HTML")
+    index_parser.add_argument("--repeat", type=int, default=3)
+    for name, help_text in (("marks", "构建历史解析与 mark 计算"), ("links", "日志链接提取")):
+        page_parser = sub.add_parser(name, help=help_text)
+        page_parser.add_argument("--html", default=None, help="已保存的展平后项目页面 HTML")
+        page_parser.add_argument("--repeat", type=int, default=5)
+    download_parser = sub.add_parser("download", help="从本地 HTTP 服务器下载日志样本")
+    all_parser = sub.add_parser("all", help="运行全部基准")
+    all_parser.add_argument("--html", default="oss_fuzz_index_with_build_status.html", help="已保存的渲染后首页 HTML")
+    all_parser.add_argument("--project-html", default=None, help="已保存的展平后项目页面 HTML")
+    all_parser.add_argument("--json", default=None, help="把各项结果写入 JSON 文件，便于对比不同版本")
+    for download_options in (download_parser, all_parser):
+        download_options.add_argument("--count", type=int, default=40)
+        download_options.add_argument("--size-kb", type=int, default=512)
+        download_options.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+        download_options.add_argument("--latency-ms", type=float, default=0.0)
+        download_options.add_argument("--fixtures", default=None, help="用该目录中已下载的日志作为样本")
+    args = parser.parse_args()
+
+    if args.command == "index":
+        bench_index(args.html, repeat=args.repeat)
+    elif args.command == "marks":
+        bench_marks(args.html, repeat=args.repeat)
+    elif args.command == "links":
+        bench_links(args.html, repeat=args.repeat)
+    elif args.command == "download":
+        bench_download(args.count, args.size_kb, args.workers, args.latency_ms, args.fixtures)
+    elif args.command == "all":
+        results = {
+            "index": bench_index(args.html),
+            "marks": bench_marks(args.project_html),
+            "links": bench_links(args.project_html),
+            "download": bench_download(args.count, args.size_kb, args.workers, args.latency_ms, args.fixtures),
+        }
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=1)
+            print(f"✅ 基准结果已保存到: {args.json}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
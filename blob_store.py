@@ -0,0 +1,176 @@
+"""
+按内容哈希去重的日志存储
+每份不同内容的日志只在 <日志目录>/.blobs/<sha 前两位>/<sha>[.gz|.zst] 保存一次，
+项目目录中的 "<日期> <状态>" 是指向它的硬链接；文件系统不支持硬链接时改为写一个
+"<日期> <状态>.ref" 文本文件，内容为 blob 相对日志目录的路径。
+用法:
+    python blob_store.py report [--dir build_error_log_of_projects]
+    python blob_store.py dedupe [--dir build_error_log_of_projects]    把已有日志转入 blob 存储
+"""
+import argparse
+import os
+import threading
+
+from log_cache import LogCache
+from log_store import REF_SUFFIX, content_sha256, read_ref
+
+BLOB_DIR_NAME = ".blobs"
+
+
+class BlobStore:
+    """
+    内容寻址的 blob 目录，键为日志原文的 sha256（与压缩方式无关），
+    同时统计本次运行新写入与命中去重的数量
+    """
+
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+        self.root = os.path.join(log_dir, BLOB_DIR_NAME)
+        self._lock = threading.Lock()
+        self.new_blobs = 0
+        self.dedup_hits = 0
+        self.saved_bytes = 0
+
+    def blob_path(self, sha256, suffix=""):
+        return os.path.join(self.root, sha256[:2], sha256 + suffix)
+
+    def find(self, sha256, suffixes=("", ".gz", ".zst")):
+        """返回该内容已有的 blob 路径，没有则返回 None"""
+        for suffix in suffixes:
+            path = self.blob_path(sha256, suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def adopt(self, path, sha256):
+        """
+        把刚写好的文件移入 blob 目录（保留其 .gz / .zst 后缀）并返回 blob 路径；
+        相同内容的 blob 已存在时删除该文件，返回已有的 blob
+        """
+        with self._lock:
+            existing = self.find(sha256)
+            if existing:
+                self.dedup_hits += 1
+                self.saved_bytes += os.path.getsize(path)
+                os.remove(path)
+                return existing
+            suffix = next((s for s in (".gz", ".zst") if path.endswith(s)), "")
+            blob = self.blob_path(sha256, suffix)
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(path, blob)
+            self.new_blobs += 1
+            return blob
+
+    def link(self, blob, entry_path):
+        """
+        在项目目录中建立指向 blob 的条目（entry_path 加上 blob 的压缩后缀），返回条目路径：
+        优先使用硬链接，失败时写 .ref 文件
+        """
+        suffix = next((s for s in (".gz", ".zst") if blob.endswith(s)), "")
+        target = entry_path + suffix
+        tmp_path = target + ".tmp"
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            os.link(blob, tmp_path)
+            os.replace(tmp_path, target)
+            return target
+        except OSError:
+            ref_path = target + REF_SUFFIX
+            with open(ref_path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(os.path.relpath(blob, self.log_dir))
+            os.replace(ref_path + ".tmp", ref_path)
+            return ref_path
+
+    def report(self):
+        """打印本次运行的去重情况"""
+        with self._lock:
+            if not (self.new_blobs or self.dedup_hits):
+                return
+            print(f"🧬 本次运行日志去重: 新内容 {self.new_blobs} 个, 重复内容 {self.dedup_hits} 个, "
+                  f"节省 {self.saved_bytes / 1024 / 1024:.2f} MB")
+
+
+def _iter_entries(log_dir):
+    """遍历各项目目录中的日志条目路径"""
+    for project in sorted(os.listdir(log_dir)):
+        project_dir = os.path.join(log_dir, project)
+        if project.startswith(".") or not os.path.isdir(project_dir):
+            continue
+        for name in sorted(os.listdir(project_dir)):
+            path = os.path.join(project_dir, name)
+            if name.startswith(".") or not os.path.isfile(path) or name.endswith((".part", ".json", ".tmp")):
+                continue
+            yield path
+
+
+def scan_report(log_dir):
+    """
+    统计整个日志目录的去重效果，返回 (条目数, 逻辑字节数, 不同内容数, 实际字节数)：
+    逻辑字节数按每个条目各存一份计算，实际字节数按 inode / blob 去重后计算
+    """
+    entries = logical = 0
+    physical = {}
+    for path in _iter_entries(log_dir):
+        target = read_ref(path) if path.endswith(REF_SUFFIX) else path
+        try:
+            st = os.stat(target)
+        except OSError:
+            continue
+        entries += 1
+        logical += st.st_size
+        physical[(st.st_dev, st.st_ino)] = st.st_size
+    return entries, logical, len(physical), sum(physical.values())
+
+
+def dedupe_existing(log_dir, update_index=True):
+    """把日志目录中尚未去重的条目转入 blob 存储，返回 (处理条目数, BlobStore)"""
+    store = BlobStore(log_dir)
+    moved = {}
+    count = 0
+    for path in _iter_entries(log_dir):
+        if path.endswith(REF_SUFFIX) or os.stat(path).st_nlink > 1:
+            continue
+        suffix = next((s for s in (".gz", ".zst") if path.endswith(s)), "")
+        entry_path = path[:-len(suffix)] if suffix else path
+        blob = store.adopt(path, content_sha256(path))
+        new_path = store.link(blob, entry_path)
+        if new_path != path:
+            moved[os.path.abspath(path)] = new_path
+        count += 1
+    if update_index and moved:
+        cache = LogCache(log_dir)
+        cache.relocate(moved)
+        cache.save()
+    return count, store
+
+
+def print_scan_report(log_dir):
+    entries, logical, unique, physical = scan_report(log_dir)
+    ratio = logical / physical if physical else 0
+    print(f"🧬 {log_dir}: {entries} 个日志条目, {unique} 份不同内容, "
+          f"逻辑大小 {logical / 1024 / 1024:.2f} MB, 实际占用 {physical / 1024 / 1024:.2f} MB, "
+          f"去重比 {ratio:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日志内容去重存储")
+    parser.add_argument("--dir", default="build_error_log_of_projects")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("report", help="统计去重比")
+    sub.add_parser("dedupe", help="把已有日志转入 blob 存储")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        print_scan_report(args.dir)
+    elif args.command == "dedupe":
+        count, store = dedupe_existing(args.dir)
+        print(f"✅ 已处理 {count} 个日志条目")
+        store.report()
+        print_scan_report(args.dir)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import os
+import queue
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # psutil 为可选依赖，缺失时直接读 /proc
+    psutil = None
+
+# 超出内存上限时单个工作线程最多暂停的秒数，到期仍超限则改为逐个处理项目
+MAX_RSS_PAUSE = 60
+
+
+def _children_map():
+    """读取 /proc，返回 {父进程pid: [子进程pid, ...]}"""
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 进程名可能包含空格和括号，从最后一个 ')' 之后开始解析
+        fields = stat[stat.rfind(")") + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(name))
+    return children
+
+
+def _read_rss_bytes(pid):
+    """读取单个进程的常驻内存 (字节)"""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_tree_rss(pid):
+    """统计 pid 及其所有子孙进程的 RSS 总和 (字节)，无法统计时返回 0"""
+    if not pid:
+        return 0
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return 0
+        total = 0
+        for p in procs:
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+    if not os.path.isdir("/proc"):
+        return 0
+    children = _children_map()
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += _read_rss_bytes(current)
+        stack.extend(children.get(current, []))
+    return total
+
+
+def driver_rss(driver):
+    """统计一个 chromedriver 及其启动的 Chrome 进程树的 RSS (字节)"""
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return 0
+    return process_tree_rss(pid)
+
+
+class BrowserPool:
+    """
+    常驻无头浏览器工作池
+    N 个工作线程各自持有一个长期存活的 Chrome，从队列中领取项目URL并调用 handler 处理。
+    所有浏览器的 RSS 总和超过 max_total_rss_mb 时，占用最多的工作线程会在处理下一个项目前重启浏览器；
+    若重启后仍然超限，其余线程暂停领取新任务直到内存回落，但始终至少有一个线程在处理；
+    暂停超过 max_pause 秒仍未回落（上限无法满足）时，所有线程改为逐个处理项目，内存回落后恢复并发。
+    """
+
+    def __init__(self, create_driver, workers=4, max_total_rss_mb=4096, rss_check_interval=1.0,
+                 max_pause=MAX_RSS_PAUSE):
+        self.create_driver = create_driver
+        self.workers = max(1, int(workers))
+        self.max_total_rss = max_total_rss_mb * 1024 * 1024 if max_total_rss_mb else None
+        self.rss_check_interval = rss_check_interval
+        self.max_pause = max_pause
+        self._drivers = {}
+        self._drivers_lock = threading.Lock()
+        # 正在处理（未退出且未暂停）的工作线程数，由 _drivers_lock 保护
+        self._active = 0
+        # 为 True 时 handler 在 _serial_lock 下执行，即同一时刻只处理一个项目
+        self._serialize = False
+        self._serial_lock = threading.Lock()
+
+    def total_rss(self):
+        """当前所有工作浏览器的 RSS 总和 (字节) 及占用最多的工作线程编号"""
+        with self._drivers_lock:
+            items = list(self._drivers.items())
+        usage = {worker_id: driver_rss(driver) for worker_id, driver in items}
+        if not usage:
+            return 0, None
+        return sum(usage.values()), max(usage, key=usage.get)
+
+    def _set_driver(self, worker_id, driver):
+        with self._drivers_lock:
+            if driver is None:
+                self._drivers.pop(worker_id, None)
+            else:
+                self._drivers[worker_id] = driver
+
+    def _quit_driver(self, worker_id, driver):
+        self._set_driver(worker_id, None)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"⚠️ 工作线程 #{worker_id} 关闭浏览器失败: {str(e)}")
+
+    def _respect_rss_cap(self, worker_id, driver):
+        """超出内存上限时重启或暂停当前工作线程，返回（可能已替换的）driver"""
+        if not self.max_total_rss:
+            return driver
+        total, heaviest = self.total_rss()
+        if total <= self.max_total_rss:
+            if self._serialize:
+                print("✅ 浏览器池内存已回落，恢复并发处理")
+                self._serialize = False
+            return driver
+        if heaviest == worker_id:
+            print(f"♻️ 浏览器池内存 {total // (1024 * 1024)} MB 超过上限，工作线程 #{worker_id} 重启浏览器")
+            self._quit_driver(worker_id, driver)
+            driver = self.create_driver()
+            self._set_driver(worker_id, driver)
+            total, _ = self.total_rss()
+        if total <= self.max_total_rss or self._serialize:
+            return driver
+
+        with self._drivers_lock:
+            # 其他线程都已暂停或退出时，本线程继续处理，保证整体仍在推进
+            if self._active <= 1:
+                return driver
+            self._active -= 1
+        try:
+            deadline = time.time() + self.max_pause
+            while total > self.max_total_rss:
+                if time.time() >= deadline:
+                    print(f"⚠️ 浏览器池内存 {total // (1024 * 1024)} MB 暂停 {self.max_pause} 秒后仍超过上限，"
+                          f"改为逐个处理项目")
+                    self._serialize = True
+                    break
+                time.sleep(self.rss_check_interval)
+                total, _ = self.total_rss()
+        finally:
+            with self._drivers_lock:
+                self._active += 1
+        return driver
+
+    def _handle(self, handler, url, driver):
+        if self._serialize:
+            with self._serial_lock:
+                return handler(url, driver)
+        return handler(url, driver)
+
+    def _worker(self, worker_id, tasks, results, results_lock, handler):
+        driver = None
+        try:
+            while True:
+                try:
+                    position, url = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if driver is None:
+                        driver = self.create_driver()
+                        self._set_driver(worker_id, driver)
+                    else:
+                        driver = self._respect_rss_cap(worker_id, driver)
+                    result = self._handle(handler, url, driver)
+                except Exception as e:
+                    print(f"❌ 工作线程 #{worker_id} 处理 {url} 时发生错误: {str(e)}")
+                    result = None
+                    # 浏览器可能已经崩溃，丢弃后下一个任务重新启动
+                    if driver is not None:
+                        self._quit_driver(worker_id, driver)
+                        driver = None
+                with results_lock:
+                    results[position] = result
+        finally:
+            if driver is not None:
+                self._quit_driver(worker_id, driver)
+            with self._drivers_lock:
+                self._active -= 1
+            print(f"🚪 工作线程 #{worker_id} 的浏览器已关闭")
+
+    def run(self, urls, handler):
+        """
+        并发处理 urls，handler(url, driver) 的返回值按输入顺序组成列表返回；
+        handler 抛出异常的项目对应 None
+        """
+        tasks = queue.Queue()
+        for position, url in enumerate(urls):
+            tasks.put((position, url))
+        results = [None] * len(urls)
+        results_lock = threading.Lock()
+
+        worker_count = min(self.workers, len(urls))
+        self._active = worker_count
+        self._serialize = False
+        print(f"🧵 启动 {worker_count} 个浏览器工作线程处理 {len(urls)} 个项目")
+        threads = []
+        for worker_id in range(worker_count):
+            t = threading.Thread(
+                target=self._worker,
+                args=(worker_id, tasks, results, results_lock, handler),
+                name=f"browser-worker-{worker_id}",
+                daemon=True,
+            )
+            t.start()
+            threads.append(t)
+        for t in threads:
+            t.join()
+        return results
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+
+class CrawlState:
+    """
+    增量抓取状态，保存为 JSON：
+      {项目名: {"builds": [{"timestamp", "status", "log_id"}, ...],  从新到旧
+                "newest": "时间戳|状态",                              最近一次构建
+                "last_crawl": "YYYY-mm-dd HH:MM:SS"}}
+    增量模式下只有最近一次构建与上次记录不同的项目才需要重新处理
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.projects = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.projects = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 抓取状态文件无法读取，将按全量抓取处理: {str(e)}")
+
+    @staticmethod
+    def newest_signature(builds):
+        """构建列表 (从新到旧) 中最近一次构建的标识，列表为空时返回 None"""
+        if not builds:
+            return None
+        newest = builds[0]
+        return f"{newest['timestamp']}|{newest['status']}"
+
+    def is_changed(self, project, builds):
+        """项目从未抓取过，或最近一次构建与上次记录不同时返回 True"""
+        signature = self.newest_signature(builds)
+        if signature is None or "unknown_time" in signature:
+            return True
+        with self._lock:
+            previous = self.projects.get(project)
+        return previous is None or previous.get("newest") != signature
+
+    def update(self, project, builds):
+        """记录项目本次看到的构建历史 (dict 需含 timestamp/status，可含 log_id)"""
+        entry = {
+            "builds": [{"timestamp": b["timestamp"], "status": b["status"], "log_id": b.get("log_id")}
+                       for b in builds],
+            "newest": self.newest_signature(builds),
+            "last_crawl": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with self._lock:
+            self.projects[project] = entry
+            self._dirty = True
+
+    def save(self):
+        """有变更时原子地写回状态文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.projects, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,193 @@
+"""
+结构化事件日志
+每次运行在 logs/ 下写一个 events_<时间戳>.jsonl，与人读的 log_<时间戳>.txt 并列，每行一个 JSON 事件：
+  {"ts": 1760252652.1, "run": "20251012_150412", "event": "phase", "phase": "download",
+   "project": "curl", "button": 3, "duration": 1.52, "bytes": 183422, "ok": true, "error": null}
+用法:
+    python events.py summary [--dir logs] [--last 10]     按阶段汇总多次运行的耗时
+    python events.py query [--dir logs] [--phase download] [--project curl] [--errors]
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from run_log import RunLogWriter
+
+EVENT_LOG_DIR = "logs"
+
+_event_writer = None
+_run_id = None
+# 进程内的事件订阅者（如 metrics.RunMetrics），不依赖事件文件是否开启
+_listeners = []
+
+
+def start_event_log(path, run_id=None):
+    """开始写本次运行的事件日志（同一时刻只有一个）"""
+    global _event_writer, _run_id
+    stop_event_log()
+    _event_writer = RunLogWriter(path)
+    _run_id = run_id
+
+
+def stop_event_log():
+    """写完并关闭事件日志，之后 emit_event 不再记录"""
+    global _event_writer
+    writer, _event_writer = _event_writer, None
+    if writer is not None:
+        writer.close()
+
+
+def add_event_listener(listener):
+    """订阅之后的每个事件：listener(record)，在发出事件的线程中同步调用，应尽快返回"""
+    _listeners.append(listener)
+
+
+def remove_event_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def emit_event(event, **fields):
+    """记录一个事件；未开启事件日志且没有订阅者时什么也不做"""
+    writer = _event_writer
+    if writer is None and not _listeners:
+        return
+    record = {"ts": round(time.time(), 3), "run": _run_id, "event": event}
+    record.update(fields)
+    for listener in list(_listeners):
+        try:
+            listener(record)
+        except Exception:
+            # 统计出错不能影响抓取本身
+            pass
+    if writer is not None:
+        writer.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+@contextmanager
+def timed_phase(phase, **fields):
+    """
+    记录一个阶段的耗时：with timed_phase("page_load", project=...) as extra: ...
+    可在块内向 extra 写入 bytes / ok 等字段；块内抛出异常时记为失败并带上异常类名
+    """
+    extra = {}
+    start = time.perf_counter()
+    try:
+        yield extra
+    except BaseException as e:
+        fields.update(extra, ok=False, error=type(e).__name__)
+        emit_event("phase", phase=phase, duration=round(time.perf_counter() - start, 4), **fields)
+        raise
+    fields.update(extra)
+    fields.setdefault("ok", True)
+    emit_event("phase", phase=phase, duration=round(time.perf_counter() - start, 4), **fields)
+
+
+def read_events(paths):
+    """逐行读取事件文件，跳过写了一半的行"""
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def event_files(directory=EVENT_LOG_DIR, last=None):
+    """按时间排序的事件文件（含轮转出的 .1 .2 …），last 只取最近几次运行"""
+    files = sorted(glob.glob(os.path.join(directory, "events_*.jsonl")))
+    if last:
+        files = files[-last:]
+    paths = []
+    for path in files:
+        paths.extend(sorted(glob.glob(path + ".*"), reverse=True))
+        paths.append(path)
+    return paths
+
+
+def percentile(sorted_values, q):
+    """已排序列表的 q 分位数（最近秩法）"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def summarize_phases(events):
+    """按阶段汇总 phase 事件，返回 {阶段: {count, errors, total, p50, p95, max, bytes}}"""
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    nbytes = defaultdict(int)
+    for event in events:
+        if event.get("event") != "phase":
+            continue
+        phase = event.get("phase", "unknown")
+        durations[phase].append(float(event.get("duration") or 0))
+        if not event.get("ok", True):
+            errors[phase] += 1
+        nbytes[phase] += int(event.get("bytes") or 0)
+    summary = {}
+    for phase, values in durations.items():
+        values.sort()
+        summary[phase] = {
+            "count": len(values),
+            "errors": errors[phase],
+            "total": sum(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": values[-1],
+            "bytes": nbytes[phase],
+        }
+    return summary
+
+
+def print_phase_summary(summary, title="⏱️ 各阶段耗时汇总"):
+    print(title)
+    print(f"  {'阶段':<14} {'次数':>7} {'失败':>6} {'总耗时(s)':>11} {'p50(s)':>9} {'p95(s)':>9} {'max(s)':>9} {'MB':>9}")
+    for phase, s in sorted(summary.items(), key=lambda item: item[1]["total"], reverse=True):
+        print(f"  {phase:<14} {s['count']:>7} {s['errors']:>6} {s['total']:>11.1f} {s['p50']:>9.2f} "
+              f"{s['p95']:>9.2f} {s['max']:>9.2f} {s['bytes'] / 1024 / 1024:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询结构化事件日志")
+    parser.add_argument("--dir", default=EVENT_LOG_DIR)
+    sub = parser.add_subparsers(dest="command")
+    summary_parser = sub.add_parser("summary", help="按阶段汇总耗时")
+    summary_parser.add_argument("--last", type=int, default=None, help="只统计最近几次运行")
+    query_parser = sub.add_parser("query", help="筛选事件")
+    query_parser.add_argument("--last", type=int, default=None)
+    query_parser.add_argument("--event")
+    query_parser.add_argument("--phase")
+    query_parser.add_argument("--project")
+    query_parser.add_argument("--errors", action="store_true", help="只看失败的事件")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        paths = event_files(args.dir, args.last)
+        runs = {event.get("run") for event in read_events(paths)}
+        print(f"📊 {len(runs)} 次运行, {len(paths)} 个事件文件")
+        print_phase_summary(summarize_phases(read_events(paths)))
+    elif args.command == "query":
+        for event in read_events(event_files(args.dir, args.last)):
+            if args.event and event.get("event") != args.event:
+                continue
+            if args.phase and event.get("phase") != args.phase:
+                continue
+            if args.project and event.get("project") != args.project:
+                continue
+            if args.errors and event.get("ok", True):
+                continue
+            print(json.dumps(event, ensure_ascii=False))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import re
+from typing import Iterator, List, Tuple
+
+# 带状态图标的 iron-icon 开始标签，例如 <iron-icon icon="icons:error" ...>
+# [^>]* 只在单个标签内部回溯，整体仍是线性扫描
+ICON_OPEN_PATTERN = re.compile(r'<iron-icon[^>]*icon=["\']icons:([\w-]+)["\']', re.IGNORECASE)
+ICON_CLOSE_PATTERN = re.compile(r'</iron-icon>', re.IGNORECASE)
+DIV_CLOSE_PATTERN = re.compile(r'</div>', re.IGNORECASE)
+
+# 图标名到状态的对应关系，其余图标按原名返回
+ICON_STATUS = {"done": "success", "error": "error"}
+
+
+def iter_project_statuses(html: str) -> Iterator[Tuple[str, str]]:
+    """
+    单次线性扫描展平后的首页 HTML，依次产出所有项目的 (项目名, 状态)
+    状态为 "success" / "error"，其他图标返回图标名本身。
+    每个项目是一个外层 <div>：状态图标 <iron-icon icon="icons:xxx"></iron-icon> 之后，
+    第一个 </div> 之前紧挨着的文本即项目名（与 extract_between_markers 原正则的匹配结果一致），
+    扫描位置只会向前推进，耗时与页面大小成正比
+    """
+    icon = ICON_OPEN_PATTERN.search(html)
+    div_close = None
+    while icon:
+        icon_close = ICON_CLOSE_PATTERN.search(html, icon.end())
+        if not icon_close:
+            return
+        # 多个图标共用同一个 </div> 时复用上次的匹配，只有越过它之后才重新查找，
+        # 否则每个图标都会把到 </div> 为止的同一段重新扫描一遍
+        if div_close is None or div_close.start() < icon_close.end():
+            div_close = DIV_CLOSE_PATTERN.search(html, icon_close.end())
+            if not div_close:
+                return
+        next_icon = ICON_OPEN_PATTERN.search(html, icon_close.end())
+        if next_icon and next_icon.start() < div_close.start():
+            # 图标与 </div> 之间还有另一个状态图标：这个图标不在项目行中（如工具栏、图例），
+            # 从下一个图标继续，否则会吞掉紧随其后的项目
+            icon = next_icon
+            continue
+        # </div> 前最后一个 '>' 之后的内容就是项目名文本
+        text_start = html.rfind(">", icon_close.end() - 1, div_close.start()) + 1
+        name = html[text_start:div_close.start()].strip()
+        if name:
+            icon_name = icon.group(1).lower()
+            yield name, ICON_STATUS.get(icon_name, icon_name)
+        # 下一个图标必然在 </div> 之后，直接复用，扫描位置仍只向前推进
+        icon = next_icon
+
+
+def extract_project_statuses(html: str) -> List[Tuple[str, str]]:
+    """iter_project_statuses 的列表形式"""
+    return list(iter_project_statuses(html))
+
+
+def extract_error_projects(html: str) -> List[str]:
+    """最近一次构建失败的项目名（all_log_obtain.extract_between_markers 与基准共用）"""
+    return [name for name, status in iter_project_statuses(html) if status == "error"]
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# 日志文件名中的 UUID，例如 /log-b03a8638-84f8-470e-9b44-88034ade6f00.txt
+LOG_UUID_PATTERN = re.compile(r"/log-([0-9A-Za-z-]+)\.txt")
+
+
+def log_uuid(log_url):
+    """从日志URL中取出 UUID，无法识别时返回 None"""
+    m = LOG_UUID_PATTERN.search(log_url or "")
+    return m.group(1) if m else None
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """分块计算文件的 sha256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _content_sha256(path):
+    """
+    日志原文的 sha256，即 blob 的键：压缩条目按解压后的内容计算，.ref 引用先解析到 blob；
+    log_store 依赖本模块，因此在函数内导入
+    """
+    from log_store import REF_SUFFIX, content_sha256, read_ref
+    if path.endswith(REF_SUFFIX):
+        path = read_ref(path)
+    return content_sha256(path)
+
+
+# 每个项目目录下的日志索引文件名
+INDEX_NAME = "index.json"
+
+
+def status_name(status):
+    """按钮状态 (1/0/-1) 转为索引中保存的状态文本"""
+    return {1: "success", 0: "error"}.get(status, "unknown")
+
+
+class LogCache:
+    """
+    按项目保存的本地日志索引，<日志目录>/<项目名>/index.json：
+      {UUID: {"timestamp", "status", "size", "sha256", "url", "file", "saved_at"}}
+    sha256 始终是日志原文的哈希（与 blob 的键相同），与条目是否压缩、是否为 .ref 引用无关；
+    日志文件名带 UUID，同一天同状态的多次构建不会互相覆盖；
+    下载前按 UUID 判断日志是否已在本地，点击按钮前按 (时间戳, 状态) 判断该构建是否已保存
+    """
+
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        # {项目名: {UUID: 记录}}，首次访问项目时从磁盘加载
+        self.projects = {}
+        self._dirty = set()
+        # 点击按钮时看到、尚未下载的构建：{项目名: {UUID: (时间戳, 状态)}}
+        self._noted = {}
+
+    def _index_path(self, project):
+        return os.path.join(self.log_dir, project, INDEX_NAME)
+
+    def _load(self, project):
+        """取出项目索引（调用方持有锁）"""
+        entries = self.projects.get(project)
+        if entries is None:
+            entries = {}
+            try:
+                with open(self._index_path(project), "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 项目 {project} 的日志索引无法读取，将重新建立: {str(e)}")
+            self.projects[project] = entries
+        return entries
+
+    def entry_path(self, project, entry):
+        return os.path.join(self.log_dir, project, entry["file"])
+
+    def lookup(self, project, uuid):
+        """返回该项目中 UUID 对应且本地文件仍然存在、大小一致的记录，否则返回 None"""
+        if not uuid:
+            return None
+        with self._lock:
+            entry = self._load(project).get(uuid)
+        if not entry:
+            return None
+        try:
+            if os.path.getsize(self.entry_path(project, entry)) != entry["size"]:
+                return None
+        except OSError:
+            return None
+        return entry
+
+    def note_build(self, project, timestamp, status, uuid):
+        """记录某个构建（按钮）对应的日志 UUID，下载完成后写入索引时使用"""
+        if not uuid:
+            return
+        with self._lock:
+            self._noted.setdefault(project, {})[uuid] = (timestamp, status)
+
+    def cached_build(self, project, timestamp, status):
+        """该构建的日志已在本地时返回索引记录，否则返回 None"""
+        if timestamp == "unknown_time":
+            return None
+        name = status_name(status)
+        with self._lock:
+            matches = [uuid for uuid, entry in self._load(project).items()
+                       if entry["timestamp"] == timestamp and entry["status"] == name]
+        for uuid in matches:
+            entry = self.lookup(project, uuid)
+            if entry:
+                return entry
+        return None
+
+    def record(self, project, uuid, path, url, sha256=None):
+        """记录一个已保存到项目目录的日志，未给出原文 sha256 时读取文件（压缩的先解压）计算"""
+        if not uuid:
+            return
+        with self._lock:
+            timestamp, status = self._noted.get(project, {}).get(uuid, ("unknown_time", None))
+        entry = {
+            "timestamp": timestamp,
+            "status": status_name(status),
+            "size": os.path.getsize(path),
+            "sha256": sha256 or _content_sha256(path),
+            "url": url,
+            "file": os.path.basename(path),
+            "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with self._lock:
+            self._load(project)[uuid] = entry
+            self._dirty.add(project)
+
+    def relocate(self, moved):
+        """
+        日志文件被移动或转存后更新索引，moved 为 {旧绝对路径: 新路径}；
+        压缩、去重不改变原文，已有的 sha256 保持不变
+        """
+        with self._lock:
+            for project in sorted(os.listdir(self.log_dir)):
+                if not os.path.exists(self._index_path(project)):
+                    continue
+                for entry in self._load(project).values():
+                    new_path = moved.get(os.path.abspath(self.entry_path(project, entry)))
+                    if new_path:
+                        entry.update(file=os.path.basename(new_path), size=os.path.getsize(new_path),
+                                     sha256=entry.get("sha256") or _content_sha256(new_path))
+                        self._dirty.add(project)
+
+    def save(self):
+        """原子地写回有变更的项目索引"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            snapshots = {project: dict(self.projects[project]) for project in dirty}
+        with self._save_lock:
+            for project, entries in snapshots.items():
+                index_path = self._index_path(project)
+                os.makedirs(os.path.dirname(index_path), exist_ok=True)
+                tmp_path = index_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entries, f, ensure_ascii=False, indent=1)
+                os.replace(tmp_path, index_path)
@@ -0,0 +1,321 @@
+import http.client
+import json
+import os
+import ssl
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+
+# 流式下载时每次读取的块大小
+CHUNK_SIZE = 64 * 1024
+# 下载过程中的临时文件后缀，完成后才重命名为正式文件名
+PART_SUFFIX = ".part"
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36")
+
+
+class DownloadError(Exception):
+    """服务器返回了非 2xx 状态码"""
+
+    def __init__(self, status, reason, url, retry_after=None):
+        super().__init__(f"HTTP Error {status}: {reason} ({url})")
+        self.status = status
+        self.reason = reason
+        self.url = url
+        # 429 / 503 时服务器建议的等待秒数
+        self.retry_after = retry_after
+
+
+class ConnectionPool:
+    """
+    按 (scheme, host, port) 复用的 HTTP keep-alive 连接池，可被多个线程共享：
+    请求前取出一个空闲连接，读完响应后放回，避免每个日志都重新握手 TLS
+    """
+
+    def __init__(self, max_idle_per_host=8, timeout=50):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        # 与原实现一致：忽略证书校验
+        self.ssl_context = ssl.create_default_context()
+        self.ssl_context.check_hostname = False
+        self.ssl_context.verify_mode = ssl.CERT_NONE
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """取出一个空闲连接，没有则新建，返回 (连接, 是否为复用连接)"""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, host, port = key
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self.ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        return conn, False
+
+    def release(self, key, conn):
+        """把读完响应的连接放回空闲列表"""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+
+# 整个进程共享的默认连接池
+default_pool = ConnectionPool()
+
+
+def _pool_key(url):
+    parts = urlsplit(url)
+    scheme = parts.scheme or "https"
+    port = parts.port or (443 if scheme == "https" else 80)
+    return (scheme, parts.hostname, port)
+
+
+def _open(url, pool, headers, max_redirects=3):
+    """
+    发送 GET 请求并跟随重定向，返回 (响应, 连接, 连接池键, 最终url)，响应体尚未读取；
+    复用的连接若已被服务器关闭，会自动换新连接重试一次
+    """
+    request_headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive"}
+    request_headers.update(headers or {})
+
+    for _ in range(max_redirects + 1):
+        key = _pool_key(url)
+        parts = urlsplit(url)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        while True:
+            conn, reused = pool.acquire(key)
+            try:
+                conn.request("GET", path, headers=request_headers)
+                response = conn.getresponse()
+                break
+            except (http.client.HTTPException, ConnectionError, BrokenPipeError):
+                conn.close()
+                # 空闲太久的 keep-alive 连接可能已被服务器断开，换新连接再试
+                if reused:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+        if response.status in (301, 302, 303, 307, 308) and response.getheader("Location"):
+            response.read()
+            _finish(pool, key, conn, response)
+            url = urljoin(url, response.getheader("Location"))
+            continue
+        if not 200 <= response.status < 300:
+            response.read()
+            _finish(pool, key, conn, response)
+            raise DownloadError(response.status, response.reason, url, response.getheader("Retry-After"))
+        return response, conn, key, url
+
+    raise DownloadError(310, "Too many redirects", url)
+
+
+def _finish(pool, key, conn, response):
+    """响应体读完后归还连接（服务器要求关闭时直接关闭）"""
+    if response.will_close:
+        conn.close()
+    else:
+        pool.release(key, conn)
+
+
+def http_get(url, pool=None, headers=None):
+    """
+    通过连接池发起 GET 请求并读取完整响应体，返回 (状态码, 响应头, 内容)；
+    非 2xx 时抛出 DownloadError
+    """
+    pool = pool or default_pool
+    response, conn, key, _ = _open(url, pool, headers)
+    try:
+        body = response.read()
+    except Exception:
+        conn.close()
+        raise
+    _finish(pool, key, conn, response)
+    return response.status, response.headers, body
+
+
+def _fsync_dir(path):
+    """把目录项的变更（rename）也落盘，不支持的平台上忽略"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _read_part_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_part_meta(meta_path, url, etag, total):
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"url": url, "etag": etag, "total": total}, f)
+
+
+def _remove_quietly(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _parse_content_range(value):
+    """解析 "bytes start-end/total"，返回 (start, total)，total 未知时为 None"""
+    try:
+        unit, spec = value.split(" ", 1)
+        byte_range, total = spec.split("/", 1)
+        start = int(byte_range.split("-", 1)[0])
+        return start, (None if total.strip() == "*" else int(total))
+    except (AttributeError, ValueError):
+        return None, None
+
+
+def stream_to_file(url, full_path, pool=None, headers=None, chunk_size=CHUNK_SIZE):
+    """
+    边下载边写入 full_path + ".part"，完成后 fsync 并原子地重命名为 full_path，
+    内存占用与日志大小无关，目标路径上永远不会出现写了一半的文件；返回文件总字节数。
+    传输中断时保留 .part 及记录 ETag / 总长度的 .part.json，下次调用同一 url 时用
+    Range + If-Range 只请求剩余部分；对象已变化时服务器返回完整内容并从头写入，
+    结束时校验文件大小与 Content-Length 一致
+    """
+    pool = pool or default_pool
+    part_path = full_path + PART_SUFFIX
+    meta_path = part_path + ".json"
+
+    offset = 0
+    meta = _read_part_meta(meta_path)
+    if meta and meta.get("url") == url and os.path.exists(part_path):
+        offset = os.path.getsize(part_path)
+    else:
+        meta = None
+        _remove_quietly(part_path, meta_path)
+
+    request_headers = dict(headers or {})
+    if offset:
+        request_headers["Range"] = f"bytes={offset}-"
+        if meta.get("etag"):
+            request_headers["If-Range"] = meta["etag"]
+
+    try:
+        response, conn, key, _ = _open(url, pool, request_headers)
+    except DownloadError as e:
+        if e.status != 416 or not offset:
+            raise
+        # 请求的起点已超出对象长度：本地部分若已完整则直接收尾，否则丢弃重新下载
+        if meta.get("total") == offset:
+            os.replace(part_path, full_path)
+            _remove_quietly(meta_path)
+            _fsync_dir(os.path.dirname(os.path.abspath(full_path)))
+            return offset
+        _remove_quietly(part_path, meta_path)
+        return stream_to_file(url, full_path, pool, headers, chunk_size)
+
+    etag = response.getheader("ETag")
+    if response.status == 206 and offset:
+        start, total = _parse_content_range(response.getheader("Content-Range"))
+        if start != offset or (meta.get("etag") and etag and etag != meta["etag"]):
+            # 续传内容与本地部分不衔接，放弃本地部分从头下载
+            response.read()
+            _finish(pool, key, conn, response)
+            _remove_quietly(part_path, meta_path)
+            return stream_to_file(url, full_path, pool, headers, chunk_size)
+        mode = "ab"
+        print(f"♻️ 从第 {offset} 字节继续下载: {url}")
+    else:
+        # 200：首次下载，或对象已变化导致 If-Range 失效，从头写入
+        length = response.getheader("Content-Length")
+        total = int(length) if length and length.isdigit() else None
+        offset = 0
+        mode = "wb"
+    _write_part_meta(meta_path, url, etag, total)
+
+    nbytes = offset
+    try:
+        with open(part_path, mode) as part_file:
+            while True:
+                chunk = response.read(chunk_size)
+                if not chunk:
+                    break
+                part_file.write(chunk)
+                nbytes += len(chunk)
+            part_file.flush()
+            os.fsync(part_file.fileno())
+    except BaseException:
+        # 保留 .part 与 .part.json，下次调用时续传
+        conn.close()
+        raise
+    _finish(pool, key, conn, response)
+
+    if total is not None and nbytes < total:
+        # 连接提前结束（http.client 此时不会报错），保留已下载部分等待续传
+        raise http.client.IncompleteRead(b"", total - nbytes)
+    if total is not None and nbytes > total:
+        _remove_quietly(part_path, meta_path)
+        raise DownloadError(0, f"文件大小 {nbytes} 与 Content-Length {total} 不一致", url)
+
+    os.replace(part_path, full_path)
+    _remove_quietly(meta_path)
+    _fsync_dir(os.path.dirname(os.path.abspath(full_path)))
+    return nbytes
+
+
+class DownloadStats:
+    """线程安全的下载统计：文件数、字节数、耗时"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.files = 0
+        self.failed = 0
+        self.bytes = 0
+        self.busy_seconds = 0.0
+
+    def record(self, nbytes, seconds):
+        with self._lock:
+            self.files += 1
+            self.bytes += nbytes
+            self.busy_seconds += seconds
+
+    def record_failure(self):
+        with self._lock:
+            self.failed += 1
+
+    def report(self):
+        """打印汇总吞吐量"""
+        elapsed = max(time.time() - self.started, 1e-6)
+        print(f"📦 下载汇总: 成功 {self.files} 个, 失败 {self.failed} 个, "
+              f"共 {self.bytes / 1024 / 1024:.2f} MB, 用时 {elapsed:.2f} 秒, "
+              f"吞吐 {self.bytes / 1024 / 1024 / elapsed:.2f} MB/s")
+
+
+def format_rate(nbytes, seconds):
+    """单个文件的下载速率文本"""
+    return f"{nbytes / 1024 / max(seconds, 1e-6):.1f} KB/s"
@@ -0,0 +1,254 @@
+"""
+构建日志的压缩存储
+日志可按原文保存，也可压缩为 "<日期> <状态>.gz"（gzip）或 ".zst"（zstd，需要安装 zstandard），
+open_log / read_log 按文件后缀透明解压，调用方不需要关心日志以哪种方式保存。
+用法:
+    python log_store.py migrate [--dir build_error_log_of_projects] [--compression gzip|zstd]
+    python log_store.py cat <日志路径>
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import sys
+
+try:
+    import zstandard
+except ImportError:  # 未安装时只支持 gzip
+    zstandard = None
+
+from log_cache import LogCache
+
+# 压缩方式对应的文件后缀
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+# 日志去重存储（blob_store）在不支持硬链接时写入的引用文件后缀
+REF_SUFFIX = ".ref"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+COPY_BUFFER = 1024 * 1024
+
+
+def check_compression(compression):
+    """校验压缩方式，None 表示按原文保存"""
+    if compression is None:
+        return None
+    if compression not in SUFFIXES:
+        raise ValueError(f"不支持的压缩方式: {compression}，可选 {', '.join(SUFFIXES)}")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd 压缩需要安装 zstandard (pip install zstandard)")
+    return compression
+
+
+def compression_of(path):
+    """按后缀判断文件的压缩方式，原文返回 None"""
+    for compression, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+
+def stored_path(path, compression):
+    """原文件路径在给定压缩方式下的实际保存路径"""
+    return path + SUFFIXES[compression] if compression else path
+
+
+def stored_variants(path):
+    """同一日志可能的所有保存路径：原文、各压缩版本及其 .ref 引用"""
+    variants = [path] + [path + suffix for suffix in SUFFIXES.values()]
+    return variants + [v + REF_SUFFIX for v in variants]
+
+
+def read_ref(ref_path):
+    """读取 .ref 文件指向的 blob 路径（相对日志目录 <日志目录>/<项目>/<文件名>.ref 保存）"""
+    with open(ref_path, "r", encoding="utf-8") as f:
+        target = f.read().strip()
+    log_dir = os.path.dirname(os.path.dirname(os.path.abspath(ref_path)))
+    return os.path.join(log_dir, target)
+
+
+def find_log(path):
+    """
+    返回 path 以任一方式保存在磁盘上的实际文件路径（原文优先），都不存在时返回 None；
+    .ref 引用会解析为其指向的 blob
+    """
+    for candidate in stored_variants(path):
+        if os.path.exists(candidate):
+            return read_ref(candidate) if candidate.endswith(REF_SUFFIX) else candidate
+    return None
+
+
+def open_log(path, mode="rt", encoding="utf-8", errors="replace"):
+    """
+    以只读方式打开日志，压缩文件按后缀透明解压；
+    path 不存在时依次尝试 .gz / .zst 版本。mode 为 "rt" 或 "rb"
+    """
+    actual = find_log(path)
+    if actual is None:
+        raise FileNotFoundError(path)
+    compression = compression_of(actual)
+    if compression == "gzip":
+        raw = gzip.open(actual, "rb")
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ValueError(f"读取 {actual} 需要安装 zstandard")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(actual, "rb"), closefd=True)
+    else:
+        raw = open(actual, "rb")
+    if "b" in mode:
+        return raw
+    return io.TextIOWrapper(io.BufferedReader(raw) if compression == "zstd" else raw,
+                            encoding=encoding, errors=errors)
+
+
+def read_log(path, encoding="utf-8", errors="replace"):
+    """读取完整日志文本"""
+    with open_log(path, "rt", encoding, errors) as f:
+        return f.read()
+
+
+def content_sha256(path, chunk_size=COPY_BUFFER):
+    """日志原文（解压后内容）的 sha256"""
+    digest = hashlib.sha256()
+    with open_log(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compress_file(src, compression, remove_source=True):
+    """
+    把原文日志流式压缩为 src + 后缀，先写临时文件再原子重命名；
+    返回压缩后的路径。compression 为 None 时原样返回 src
+    """
+    if not check_compression(compression):
+        return src
+    dst = stored_path(src, compression)
+    tmp_path = dst + ".tmp"
+    with open(src, "rb") as fin, open(tmp_path, "wb") as fout:
+        if compression == "gzip":
+            with gzip.GzipFile(filename="", mode="wb", fileobj=fout, compresslevel=GZIP_LEVEL, mtime=0) as gz:
+                shutil.copyfileobj(fin, gz, COPY_BUFFER)
+        else:
+            zstandard.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(fin, fout, read_size=COPY_BUFFER)
+        fout.flush()
+        os.fsync(fout.fileno())
+    os.replace(tmp_path, dst)
+    if remove_source:
+        os.remove(src)
+    return dst
+
+
+def _migrate_blobs(root, compression, moved):
+    """
+    把 .blobs 中的原文 blob 就地压缩为 <sha>.gz / .zst，并把指向它的项目条目（硬链接或 .ref）
+    重新链接到压缩后的 blob；旧条目路径 -> 新路径记入 moved，返回 (blob 数, 原始字节数, 压缩后字节数)
+    """
+    from blob_store import BLOB_DIR_NAME, BlobStore
+    store = BlobStore(root)
+    blob_root = os.path.join(root, BLOB_DIR_NAME)
+    if not os.path.isdir(blob_root):
+        return 0, 0, 0
+
+    # 先找出每个 blob 被哪些项目条目引用：硬链接按 inode 对应，.ref 按其中记录的路径对应
+    by_inode = {}
+    by_ref = {}
+    for project in sorted(os.listdir(root)):
+        project_dir = os.path.join(root, project)
+        if project.startswith(".") or not os.path.isdir(project_dir):
+            continue
+        for name in sorted(os.listdir(project_dir)):
+            path = os.path.join(project_dir, name)
+            if name.startswith(".") or not os.path.isfile(path) or name.endswith((".part", ".json", ".tmp")):
+                continue
+            if name.endswith(REF_SUFFIX):
+                by_ref.setdefault(os.path.abspath(read_ref(path)), []).append(path)
+            else:
+                st = os.stat(path)
+                if st.st_nlink > 1:
+                    by_inode.setdefault((st.st_dev, st.st_ino), []).append(path)
+
+    blobs = before = after = 0
+    for prefix in sorted(os.listdir(blob_root)):
+        prefix_dir = os.path.join(blob_root, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for name in sorted(os.listdir(prefix_dir)):
+            blob = os.path.join(prefix_dir, name)
+            if compression_of(name) or name.endswith(".tmp") or not os.path.isfile(blob):
+                continue
+            st = os.stat(blob)
+            entries = by_inode.get((st.st_dev, st.st_ino), []) + by_ref.get(os.path.abspath(blob), [])
+            new_blob = compress_file(blob, compression, remove_source=False)
+            for entry in entries:
+                entry_path = entry[:-len(REF_SUFFIX)] if entry.endswith(REF_SUFFIX) else entry
+                new_path = store.link(new_blob, entry_path)
+                if new_path != entry:
+                    os.remove(entry)
+                    moved[os.path.abspath(entry)] = new_path
+            os.remove(blob)
+            blobs += 1
+            before += st.st_size
+            after += os.path.getsize(new_blob)
+    return blobs, before, after
+
+
+def migrate(root, compression="gzip", update_index=True):
+    """
+    把 root 下各项目目录中的原文日志压缩保存：去重存储 (.blobs) 中的 blob 就地压缩后重新链接各项目条目，
+    其余独立保存的原文日志直接压缩；同步更新日志缓存索引中的路径，返回 (文件数, 原始字节数, 压缩后字节数)
+    """
+    check_compression(compression)
+    cache = LogCache(root) if update_index else None
+    moved = {}
+    files, before, after = _migrate_blobs(root, compression, moved)
+    for project in sorted(os.listdir(root)):
+        project_dir = os.path.join(root, project)
+        if project.startswith(".") or not os.path.isdir(project_dir):
+            continue
+        for name in sorted(os.listdir(project_dir)):
+            path = os.path.join(project_dir, name)
+            # 已压缩的条目和指向 blob 的硬链接 / 引用不再处理
+            if (name.startswith(".") or not os.path.isfile(path) or compression_of(name)
+                    or name.endswith((".part", ".json", ".tmp", REF_SUFFIX)) or os.stat(path).st_nlink > 1):
+                continue
+            size = os.path.getsize(path)
+            new_path = compress_file(path, compression)
+            moved[os.path.abspath(path)] = new_path
+            files += 1
+            before += size
+            after += os.path.getsize(new_path)
+    if cache is not None:
+        cache.relocate(moved)
+        cache.save()
+    return files, before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建日志压缩存储")
+    sub = parser.add_subparsers(dest="command")
+    migrate_parser = sub.add_parser("migrate", help="压缩已有的原文日志")
+    migrate_parser.add_argument("--dir", default="build_error_log_of_projects")
+    migrate_parser.add_argument("--compression", default="gzip", choices=sorted(SUFFIXES))
+    cat_parser = sub.add_parser("cat", help="输出一个日志的原文")
+    cat_parser.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        files, before, after = migrate(args.dir, args.compression)
+        ratio = before / after if after else 0
+        print(f"🗜️ 已压缩 {files} 个日志: {before / 1024 / 1024:.2f} MB → {after / 1024 / 1024:.2f} MB "
+              f"(压缩比 {ratio:.1f}x)")
+    elif args.command == "cat":
+        with open_log(args.path) as f:
+            shutil.copyfileobj(f, sys.stdout)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
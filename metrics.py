@@ -0,0 +1,145 @@
+"""
+单次运行的耗时统计
+订阅 events.py 发出的事件，在内存中按阶段汇总耗时（p50/p95/max）、按项目汇总耗时与下载量，
+运行结束时由 main() 打印，并保存为 logs/metrics_<时间戳>.json 与该次运行的日志放在一起。
+用法:
+    python metrics.py show logs/metrics_20251012_150412.json     重新打印某次运行的统计
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from events import add_event_listener, print_phase_summary, remove_event_listener, summarize_phases
+
+# 报告中列出的耗时最长的项目数
+TOP_PROJECTS = 15
+
+
+class RunMetrics:
+    """
+    一次运行的统计：start() 后订阅事件，stop() 取消订阅；
+    事件可能来自多个线程（浏览器池、下载线程池），因此由锁保护
+    """
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._phase_events = []
+        self._projects = defaultdict(lambda: {"duration": 0.0, "downloads": 0, "bytes": 0, "errors": 0})
+        self.cache_hits = 0
+        self.retries = 0
+        self.started = None
+        self.finished = None
+
+    def start(self):
+        self.started = time.time()
+        add_event_listener(self.observe)
+
+    def stop(self):
+        remove_event_listener(self.observe)
+        self.finished = time.time()
+
+    def observe(self, record):
+        event = record.get("event")
+        if event == "phase":
+            with self._lock:
+                # 只保留汇总需要的字段，长时间运行也不会占用太多内存
+                self._phase_events.append({key: record.get(key)
+                                           for key in ("event", "phase", "duration", "ok", "bytes")})
+                project = record.get("project")
+                if not project:
+                    return
+                totals = self._projects[project]
+                phase = record.get("phase")
+                if phase == "project":
+                    totals["duration"] += float(record.get("duration") or 0)
+                elif phase == "download" and record.get("ok", True):
+                    totals["downloads"] += 1
+                    totals["bytes"] += int(record.get("bytes") or 0)
+                if not record.get("ok", True):
+                    totals["errors"] += 1
+        elif event == "cache_hit":
+            with self._lock:
+                self.cache_hits += 1
+        elif event == "retry":
+            with self._lock:
+                self.retries += 1
+
+    def to_dict(self):
+        with self._lock:
+            phases = summarize_phases(self._phase_events)
+            projects = {name: dict(totals) for name, totals in self._projects.items()}
+            cache_hits, retries = self.cache_hits, self.retries
+        elapsed = ((self.finished or time.time()) - self.started) if self.started else 0.0
+        download = phases.get("download", {})
+        downloaded = download.get("bytes", 0)
+        return {
+            "run": self.run_id,
+            "elapsed": round(elapsed, 3),
+            "phases": phases,
+            "projects": projects,
+            "downloads": download.get("count", 0) - download.get("errors", 0),
+            "bytes": downloaded,
+            # 整体吞吐按运行总时长计算；单连接吞吐按各次下载耗时之和计算
+            "throughput": downloaded / elapsed if elapsed else 0.0,
+            "per_download_throughput": downloaded / download["total"] if download.get("total") else 0.0,
+            "cache_hits": cache_hits,
+            "retries": retries,
+        }
+
+    def save(self, path):
+        """原子写入统计结果，返回写入的内容"""
+        report = self.to_dict()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+        return report
+
+    def report(self):
+        print_report(self.to_dict())
+
+
+def print_report(report, top=TOP_PROJECTS):
+    """打印 to_dict() 格式的统计结果"""
+    print("\n" + "=" * 80)
+    print(f"📈 运行统计 {report.get('run') or ''}: 总耗时 {report['elapsed']:.1f} 秒")
+    if report["phases"]:
+        print_phase_summary(report["phases"])
+
+    projects = report["projects"]
+    if projects:
+        ranked = sorted(projects.items(), key=lambda item: item[1]["duration"], reverse=True)
+        print(f"🏗️ 各项目耗时 (共 {len(projects)} 个, 列出前 {min(top, len(projects))} 个)")
+        print(f"  {'项目':<28} {'耗时(s)':>9} {'下载数':>7} {'MB':>9} {'失败':>6}")
+        for name, totals in ranked[:top]:
+            print(f"  {name:<28} {totals['duration']:>9.1f} {totals['downloads']:>7} "
+                  f"{totals['bytes'] / 1024 / 1024:>9.2f} {totals['errors']:>6}")
+
+    print(f"📥 下载 {report['downloads']} 个日志, 共 {report['bytes'] / 1024 / 1024:.2f} MB, "
+          f"整体吞吐 {report['throughput'] / 1024 / 1024:.2f} MB/s, "
+          f"单连接吞吐 {report['per_download_throughput'] / 1024 / 1024:.2f} MB/s")
+    print(f"⏭️ 缓存命中 {report['cache_hits']} 次, 🔁 重试 {report['retries']} 次")
+    print("=" * 80)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查看运行统计")
+    sub = parser.add_subparsers(dest="command")
+    show_parser = sub.add_parser("show", help="打印保存的运行统计")
+    show_parser.add_argument("path")
+    show_parser.add_argument("--top", type=int, default=TOP_PROJECTS)
+    args = parser.parse_args()
+
+    if args.command == "show":
+        with open(args.path, "r", encoding="utf-8") as f:
+            print_report(json.load(f), args.top)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
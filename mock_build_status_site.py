@@ -0,0 +1,398 @@
+"""
+OSS-Fuzz 构建状态站点的本地模拟，用于在不访问线上站点的情况下压测浏览器路径
+（浏览器池、流水线、就绪检测等），数据由随机种子决定，每次运行完全相同。
+页面结构与线上一致：
+  <build-status> 的 shadowRoot 中，首页每个项目是一个 <div>，内含 <iron-icon icon="icons:error|done"> 与项目名；
+  项目页 (index.html#项目名) 有 paper-button.green（最后一次成功构建）、div.buildHistory 中的
+  paper-button 历史按钮（带状态图标与 "2025/10/12 15:04:12" 形式的时间），点击后日志面板中出现
+  <a href="/log-<build_id>.txt">；iron-icon / paper-button 自身也带 shadowRoot
+同时提供 /status.json（与线上格式相同）和 /log-<build_id>.txt
+用法:
+    python mock_build_status_site.py serve [--port 8765 --projects 50 --history 30 --render-delay-ms 500 --log-kb 64]
+    python mock_build_status_site.py run [站点参数] [--workers 2 --pipeline --backend selenium|feed --work-dir mock_run]
+run 在后台启动模拟站点，把抓取器指向它，在 work-dir 中完整运行一次 main()，运行统计见 work-dir/logs
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmark import synthetic_log
+
+DEFAULT_PORT = 8765
+
+# 站点参数的默认值，可由命令行覆盖
+DEFAULT_SITE_OPTIONS = {
+    "projects": 50,           # 项目数
+    "history": 30,            # 每个项目的构建历史长度
+    "fail_ratio": 0.3,        # 最近一次构建失败的项目比例
+    "render_delay_ms": 500,   # build-status 开始渲染前的延迟
+    "chunk": 10,              # 按钮 / 项目分批渲染，每批的数量
+    "chunk_delay_ms": 50,     # 两批之间的间隔，用来检验"数量稳定"的就绪判断
+    "log_delay_ms": 200,      # 点击按钮后日志链接出现的延迟
+    "inline_links": False,    # 历史按钮上是否直接带日志链接（不需要点击）
+    "log_kb": 64,             # 每个日志的大小
+    "log_error_rate": 0.0,    # 日志请求返回 503 的比例，用来检验重试
+    "seed": 0,
+}
+
+LOG_PATH_PATTERN = re.compile(r"^/log-([0-9a-f-]+)\.txt$")
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>OSS-Fuzz build status (mock)</title>
+</head>
+<body>
+<build-status></build-status>
+<script>
+const CONFIG = __CONFIG__;
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+const ICON_PATHS = {
+    "icons:done": "M9 16.2L4.8 12l-1.4 1.4L9 19 21 7l-1.4-1.4L9 16.2z",
+    "icons:error": "M12 2C6.48 2 2 6.48 2 12s4.48 10 10 10 10-4.48 10-10S17.52 2 12 2zm1 15h-2v-2h2v2zm0-4h-2V7h2v6z",
+    "icons:help": "M11 18h2v-2h-2v2zm1-16C6.48 2 2 6.48 2 12s4.48 10 10 10 10-4.48 10-10S17.52 2 12 2z"
+};
+
+class IronIcon extends HTMLElement {
+    connectedCallback() {
+        if (this.shadowRoot) return;
+        const d = ICON_PATHS[this.getAttribute("icon")] || ICON_PATHS["icons:help"];
+        this.attachShadow({mode: "open"}).innerHTML =
+            '<style>:host{display:inline-flex;width:24px;height:24px;fill:currentcolor}</style>' +
+            '<svg viewBox="0 0 24 24"><g><path d="' + d + '"></path></g></svg>';
+    }
+}
+
+class PaperButton extends HTMLElement {
+    connectedCallback() {
+        if (this.shadowRoot) return;
+        this.attachShadow({mode: "open"}).innerHTML =
+            '<style>:host{display:inline-flex;align-items:center;margin:2px;padding:4px 8px;cursor:pointer}' +
+            ':host(.green){background:#c8e6c9}</style><slot></slot>';
+    }
+}
+
+customElements.define("iron-icon", IronIcon);
+customElements.define("paper-button", PaperButton);
+
+function iconOf(build) {
+    return build.success === true ? "icons:done" : build.success === false ? "icons:error" : "icons:help";
+}
+
+// 与页面按钮一致的本地时间格式：2025/10/12 15:04:12（月/日不补零）
+function formatTime(finishTime) {
+    const d = new Date(finishTime);
+    const pad = n => String(n).padStart(2, "0");
+    return d.getFullYear() + "/" + (d.getMonth() + 1) + "/" + d.getDate() + " " +
+        pad(d.getHours()) + ":" + pad(d.getMinutes()) + ":" + pad(d.getSeconds());
+}
+
+class BuildStatus extends HTMLElement {
+    connectedCallback() {
+        this.attachShadow({mode: "open"});
+        this._token = 0;
+        window.addEventListener("hashchange", () => this.load());
+        this.load();
+    }
+
+    async load() {
+        const token = ++this._token;
+        this.shadowRoot.innerHTML = "";
+        await sleep(CONFIG.render_delay_ms);
+        const data = await (await fetch("status.json")).json();
+        if (token !== this._token) return;
+        const name = decodeURIComponent(location.hash.slice(1));
+        const project = data.projects.find(p => p.name === name);
+        if (project) {
+            await this.renderProject(project, token);
+        } else {
+            await this.renderIndex(data.projects, token);
+        }
+    }
+
+    // 分批追加元素，模拟组件逐步渲染
+    async appendInChunks(parent, items, render, token) {
+        for (let i = 0; i < items.length; i += CONFIG.chunk) {
+            if (token !== this._token) return;
+            items.slice(i, i + CONFIG.chunk).forEach((item, k) => parent.appendChild(render(item, i + k)));
+            if (i + CONFIG.chunk < items.length) await sleep(CONFIG.chunk_delay_ms);
+        }
+    }
+
+    async renderIndex(projects, token) {
+        const root = this.shadowRoot;
+        root.innerHTML = '<style>.project{display:flex;align-items:center;gap:4px}</style>' +
+            '<h1 class="style-scope build-status">OSS-Fuzz build status</h1>' +
+            '<div class="projects style-scope build-status"></div>';
+        await this.appendInChunks(root.querySelector("div.projects"), projects, project => {
+            const row = document.createElement("div");
+            row.className = "project style-scope build-status";
+            const latest = project.history[0] || {};
+            row.innerHTML = '<iron-icon icon="' + iconOf(latest) + '" class="style-scope build-status"></iron-icon>\\n' +
+                "                  " + project.name;
+            return row;
+        }, token);
+    }
+
+    async renderProject(project, token) {
+        const root = this.shadowRoot;
+        root.innerHTML = '<style>.buildHistory{display:flex;flex-wrap:wrap}</style>' +
+            '<h2 class="style-scope build-status"></h2>' +
+            '<div class="buildHistory style-scope build-status"></div>' +
+            '<div class="logPanel style-scope build-status"></div>';
+        root.querySelector("h2").textContent = project.name;
+        const panel = root.querySelector("div.logPanel");
+        const showLog = build => {
+            // 先清空面板，稍后再出现新链接，与线上点击后异步加载日志的行为一致
+            panel.innerHTML = "";
+            const clickToken = this._clickToken = (this._clickToken || 0) + 1;
+            setTimeout(() => {
+                if (clickToken !== this._clickToken) return;
+                panel.innerHTML = '<a class="style-scope build-status" href="/log-' + build.build_id +
+                    '.txt">Build log ' + build.build_id + '</a>';
+            }, CONFIG.log_delay_ms);
+        };
+        const makeButton = (build, green) => {
+            const btn = document.createElement("paper-button");
+            btn.className = (green ? "green " : "") + "style-scope build-status";
+            btn.innerHTML = '<iron-icon icon="' + (green ? "icons:done" : iconOf(build)) +
+                '" class="style-scope build-status"></iron-icon> ' +
+                (green ? "Last successful build " : "") + formatTime(build.finish_time) +
+                (CONFIG.inline_links && !green ? ' <a href="/log-' + build.build_id + '.txt">log</a>' : "");
+            btn.addEventListener("click", () => showLog(build));
+            return btn;
+        };
+        if (project.last_successful_build) {
+            root.insertBefore(makeButton(project.last_successful_build, true), root.querySelector("div.buildHistory"));
+        }
+        await this.appendInChunks(root.querySelector("div.buildHistory"), project.history,
+                                  build => makeButton(build, false), token);
+    }
+}
+
+customElements.define("build-status", BuildStatus);
+</script>
+</body>
+</html>
+"""
+
+
+def generate_status(projects=50, history=30, fail_ratio=0.3, seed=0, **_):
+    """
+    生成与线上 status.json 格式相同的数据：{"projects": [{"name", "history", "last_successful_build"}]}
+    history 从新到旧，状态成段出现；约 fail_ratio 的项目最近一次构建失败
+    """
+    rng = random.Random(seed)
+    now = datetime(2025, 10, 12, 15, 0, 0, tzinfo=timezone.utc)
+    result = []
+    for i in range(projects):
+        failing = rng.random() < fail_ratio
+        success = not failing
+        builds = []
+        finish = now - timedelta(minutes=rng.randrange(60))
+        for _ in range(history):
+            builds.append({
+                "build_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "finish_time": finish.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                "success": success,
+            })
+            finish -= timedelta(hours=rng.choice((6, 12, 24)))
+            # 越往前越可能切换状态，形成若干段连续的成功 / 失败
+            if rng.random() < 0.25:
+                success = not success
+        last_success = next((b for b in builds if b["success"]), None)
+        if last_success is None:
+            last_success = {
+                "build_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "finish_time": finish.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            }
+        result.append({"name": f"mock-project-{i:04d}", "history": builds,
+                       "last_successful_build": {"build_id": last_success["build_id"],
+                                                 "finish_time": last_success["finish_time"]}})
+    return {"projects": result}
+
+
+class MockSiteHandler(BaseHTTPRequestHandler):
+    """首页、status.json 与日志；日志支持 Range 续传，按 log_error_rate 随机返回 503"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        site = self.server.site
+        path = self.path.split("?")[0].split("#")[0]
+        if path in ("/", "/index.html"):
+            self._send(200, site["page"], "text/html; charset=utf-8")
+        elif path == "/status.json":
+            self._send(200, site["status_json"], "application/json")
+        else:
+            m = LOG_PATH_PATTERN.match(path)
+            if not m or m.group(1) not in site["build_ids"]:
+                self._send(404, b"not found", "text/plain")
+            elif site["options"]["log_error_rate"] and random.random() < site["options"]["log_error_rate"]:
+                self._send(503, b"service unavailable", "text/plain", {"Retry-After": "1"})
+            else:
+                self._send_log(site, m.group(1))
+
+    def _send_log(self, site, build_id):
+        header = f"build {build_id}\n".encode("utf-8")
+        body = header + site["log_body"][:max(site["log_size"] - len(header), 0)]
+        etag = f'"{build_id}"'
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        m = re.match(r"bytes=(\d+)-$", range_header or "")
+        if m and (not if_range or if_range == etag):
+            start = int(m.group(1))
+            if start >= len(body):
+                self._send(416, b"", "text/plain", {"Content-Range": f"bytes */{len(body)}"})
+                return
+            self._send(206, body[start:], "text/plain", {
+                "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}", "ETag": etag})
+            return
+        self._send(200, body, "text/plain", {"ETag": etag})
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def build_site(**options):
+    """根据站点参数生成页面、状态数据与日志模板"""
+    opts = dict(DEFAULT_SITE_OPTIONS)
+    opts.update({k: v for k, v in options.items() if v is not None})
+    status = generate_status(**opts)
+    page_config = {key: opts[key] for key in
+                   ("render_delay_ms", "chunk", "chunk_delay_ms", "log_delay_ms", "inline_links")}
+    build_ids = set()
+    for project in status["projects"]:
+        build_ids.update(b["build_id"] for b in project["history"])
+        build_ids.add(project["last_successful_build"]["build_id"])
+    log_size = opts["log_kb"] * 1024
+    return {
+        "options": opts,
+        "status": status,
+        "status_json": json.dumps(status).encode("utf-8"),
+        "page": PAGE_TEMPLATE.replace("__CONFIG__", json.dumps(page_config)).encode("utf-8"),
+        "build_ids": build_ids,
+        "log_size": log_size,
+        # 所有日志共用同一段正文，只在开头写上各自的 build_id，内容各不相同且生成开销固定
+        "log_body": synthetic_log(log_size, opts["seed"]),
+    }
+
+
+@contextlib.contextmanager
+def mock_site(host="127.0.0.1", port=0, site=None, **options):
+    """
+    在后台线程中运行模拟站点，产出站点根URL，如 http://127.0.0.1:8765；
+    site 为 build_site 的结果，不传时按 options 生成
+    """
+    server = ThreadingHTTPServer((host, port), MockSiteHandler)
+    server.daemon_threads = True
+    server.site = site or build_site(**options)
+    thread = threading.Thread(target=server.serve_forever, name="mock-build-status-site", daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def print_site_summary(base_url, site):
+    opts = site["options"]
+    projects = site["status"]["projects"]
+    failing = sum(1 for p in projects if p["history"] and p["history"][0]["success"] is False)
+    print(f"🧪 模拟站点: {base_url}/index.html")
+    print(f"  {len(projects)} 个项目 (其中 {failing} 个最近一次构建失败), 每个项目 {opts['history']} 条构建历史")
+    print(f"  渲染延迟 {opts['render_delay_ms']} ms, 每批 {opts['chunk']} 个元素间隔 {opts['chunk_delay_ms']} ms, "
+          f"日志链接延迟 {opts['log_delay_ms']} ms, 日志 {opts['log_kb']} KB")
+
+
+def run_crawler(base_url, chromedriver_path, work_dir="mock_run", workers=1, pipeline=False, backend="selenium",
+                incremental=False):
+    """把抓取器指向模拟站点，在 work_dir 中完整运行一次 main()"""
+    import all_log_obtain as crawler
+    chromedriver_path = os.path.abspath(chromedriver_path)
+    os.makedirs(work_dir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        # main() 会读写这些列表文件
+        for name in ("target_url_list.txt", "wrong_url_list.txt", "project_url_list.txt"):
+            if not os.path.exists(name):
+                open(name, "w", encoding="utf-8").close()
+        crawler.use_site(base_url)
+        start = time.time()
+        crawler.main(chromedriver_path, workers=workers, backend=backend, feed_url=base_url + "/status.json",
+                     incremental=incremental, pipeline=pipeline)
+        print(f"🏁 模拟站点抓取完成, 用时 {time.time() - start:.1f} 秒, 结果保存在 {os.path.abspath('.')}")
+    finally:
+        os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟 OSS-Fuzz 构建状态站点")
+    sub = parser.add_subparsers(dest="command")
+    serve_parser = sub.add_parser("serve", help="启动模拟站点")
+    run_parser = sub.add_parser("run", help="启动模拟站点并对其完整抓取一次")
+    for site_parser in (serve_parser, run_parser):
+        site_parser.add_argument("--host", default="127.0.0.1")
+        site_parser.add_argument("--projects", type=int)
+        site_parser.add_argument("--history", type=int)
+        site_parser.add_argument("--fail-ratio", type=float)
+        site_parser.add_argument("--render-delay-ms", type=int)
+        site_parser.add_argument("--chunk", type=int)
+        site_parser.add_argument("--chunk-delay-ms", type=int)
+        site_parser.add_argument("--log-delay-ms", type=int)
+        site_parser.add_argument("--inline-links", action="store_true", default=None)
+        site_parser.add_argument("--log-kb", type=int)
+        site_parser.add_argument("--log-error-rate", type=float)
+        site_parser.add_argument("--seed", type=int)
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    run_parser.add_argument("--port", type=int, default=0)
+    run_parser.add_argument("--chromedriver",
+                            default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                 "chromedriver", "chromedriver-linux64", "chromedriver"))
+    run_parser.add_argument("--work-dir", default="mock_run")
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--pipeline", action="store_true")
+    run_parser.add_argument("--backend", choices=("selenium", "feed"), default="selenium")
+    run_parser.add_argument("--incremental", action="store_true")
+    args = parser.parse_args()
+
+    if args.command not in ("serve", "run"):
+        parser.print_help()
+        return
+    site = build_site(**{key: getattr(args, key) for key in DEFAULT_SITE_OPTIONS})
+    with mock_site(args.host, args.port, site) as base_url:
+        print_site_summary(base_url, site)
+        if args.command == "serve":
+            print("按 Ctrl+C 停止")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+        else:
+            run_crawler(base_url, args.chromedriver, args.work_dir, args.workers, args.pipeline, args.backend,
+                        args.incremental)
+
+
+if __name__ == "__main__":
+    main()
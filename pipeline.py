@@ -0,0 +1,228 @@
+"""
+异步分阶段抓取流水线
+发现 → 提取 → 下载 三个阶段通过有界队列衔接：提取阶段每找到一个日志URL就立即放入下载队列，
+下载不必等整个项目（更不必等所有项目）提取完毕，总耗时取决于最慢的阶段而不是各阶段之和；
+队列满时上游阶段会等待，浏览器不会远远跑在下载前面。
+浏览器操作与下载都是阻塞调用，分别放在各自的线程池中执行（兼容 Python 3.8，不使用 asyncio.to_thread）
+"""
+import asyncio
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from log_downloader import DownloadStats
+from status_feed import STATUS_FEED_URL
+
+# 各阶段之间的队列容量
+PROJECT_QUEUE_SIZE = 64
+DOWNLOAD_QUEUE_SIZE = 256
+
+
+class LogPipeline:
+    """
+    一次流水线运行：
+      发现阶段  discover_projects 获取项目列表，连同上次运行失败的项目放入项目队列
+      提取阶段  extract_workers 个线程各自持有一个浏览器，处理项目并把日志URL逐个放入下载队列
+      下载阶段  download_workers 个并发下载
+    项目的全部日志都下载成功后才记录增量抓取状态
+    crawler: 提供抓取函数与共享状态（重试预算、日志索引、站点地址等）的模块，应传入调用方所在的模块；
+    all_log_obtain.py 作为脚本运行时它是 __main__，在这里重新 import all_log_obtain 会得到另一份全局状态
+    """
+
+    def __init__(self, chromedriver_path, extract_workers=1, download_workers=None,
+                 backend="selenium", feed_url=STATUS_FEED_URL, incremental=False, crawler=None):
+        self.crawler = crawler or importlib.import_module("all_log_obtain")
+        self.chromedriver_path = chromedriver_path
+        self.extract_workers = max(1, extract_workers)
+        self.download_workers = max(1, download_workers or self.crawler.DOWNLOAD_WORKERS)
+        self.backend = backend
+        self.feed_url = feed_url
+        self.incremental = incremental
+        self.feed_projects = None
+        self.stats = DownloadStats()
+
+        # 每个提取线程一个常驻浏览器，首次需要时创建
+        self._local = threading.local()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+
+        # 以下状态只在事件循环线程中读写
+        self._pending = {}    # 项目 -> 尚未完成的下载数
+        self._failed = {}     # 项目 -> 下载失败数
+        self._results = {}    # 项目 -> 提取阶段的结果（提取结束后才有）
+        self._queued = set()  # 已放入下载队列的 (日志URL, 文件名)，避免两个下载同时写同一个文件
+
+    # —— 提取阶段（线程池中执行）——
+
+    def _driver(self):
+        driver = getattr(self._local, "driver", None)
+        if driver is None:
+            driver = self.crawler.create_chrome_driver(self.chromedriver_path, enable_gpu=True,
+                                                       window_size="1200,900")
+            self._local.driver = driver
+            with self._drivers_lock:
+                self._drivers.append(driver)
+        return driver
+
+    def _drop_driver(self):
+        """会话出错后丢弃当前线程的浏览器，下一个项目重新创建"""
+        driver = getattr(self._local, "driver", None)
+        if driver is None:
+            return
+        self._local.driver = None
+        with self._drivers_lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _extract(self, url, incremental, on_log_url):
+        project_name = self.crawler.project_name_from_url(url)
+        in_feed = bool(self.feed_projects) and project_name in self.feed_projects
+        driver = None if in_feed else self._driver()
+        result = self.crawler.fetch_rendered_page_and_done(self.chromedriver_path, url, 0, driver=driver,
+                                                           feed_projects=self.feed_projects,
+                                                           incremental=incremental, on_log_url=on_log_url)
+        if result is None and driver is not None:
+            self._drop_driver()
+        return result
+
+    def close_drivers(self):
+        with self._drivers_lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        if drivers:
+            print(f"🚪 流水线的 {len(drivers)} 个浏览器已关闭")
+
+    # —— 事件循环中的各阶段 ——
+
+    async def _discover(self, loop, project_queue, extract_executor):
+        # 上次运行失败的项目本次重试；本次的失败重新记入 wrong_url_list.txt 留给下次
+        retry_urls = self.crawler.read_url_list("wrong_url_list.txt")
+        with open("wrong_url_list.txt", "w", encoding="utf-8") as f:
+            f.write("")
+
+        seen = set()
+        try:
+            self.feed_projects = await loop.run_in_executor(
+                extract_executor, self.crawler.discover_projects, self.chromedriver_path, self.backend,
+                self.feed_url)
+
+            items = [(url, self.incremental) for url in self.crawler.read_url_list("project_url_list.txt")]
+            items += [(url, False) for url in retry_urls]
+            for url, incremental in items:
+                if url in seen:
+                    continue
+                seen.add(url)
+                await project_queue.put((url, incremental))
+        finally:
+            # 无论发现阶段是否出错，都让提取阶段正常结束
+            for _ in range(self.extract_workers):
+                await project_queue.put(None)
+        print(f"📋 流水线发现阶段完成: {len(seen)} 个项目")
+
+    async def _enqueue_download(self, download_queue, project, log_url, filename):
+        key = (log_url, filename)
+        if key in self._queued:
+            return
+        self._queued.add(key)
+        self._pending[project] = self._pending.get(project, 0) + 1
+        await download_queue.put((project, log_url, filename))
+
+    async def _extract_worker(self, loop, project_queue, download_queue, extract_executor):
+        while True:
+            item = await project_queue.get()
+            if item is None:
+                return
+            url, incremental = item
+            project = self.crawler.project_name_from_url(url)
+            self._pending.setdefault(project, 0)
+
+            def on_log_url(log_url, filename, project=project):
+                # 在提取线程中调用：下载队列满时在此等待，形成背压
+                asyncio.run_coroutine_threadsafe(
+                    self._enqueue_download(download_queue, project, log_url, filename), loop).result()
+
+            try:
+                result = await loop.run_in_executor(extract_executor, self._extract, url, incremental, on_log_url)
+            except Exception as e:
+                print(f"❌ 提取项目 {project} 时发生错误: {str(e)}")
+                self.crawler.append_line("wrong_url_list.txt", url)
+                result = None
+            self._results[project] = result
+            self._maybe_finish(project)
+
+    async def _download_worker(self, loop, download_queue, download_executor):
+        while True:
+            item = await download_queue.get()
+            if item is None:
+                return
+            project, log_url, filename = item
+            try:
+                ok = await loop.run_in_executor(download_executor, self.crawler.download_with_urllib,
+                                                log_url, filename, project, self.stats)
+            except Exception as e:
+                print(f"❌ 下载日志失败: {log_url}: {str(e)}")
+                ok = False
+            if not ok:
+                self._failed[project] = self._failed.get(project, 0) + 1
+            self._pending[project] -= 1
+            self._maybe_finish(project)
+
+    def _maybe_finish(self, project):
+        """项目提取已结束且下载全部完成时收尾：保存日志索引，全部成功则记录抓取状态"""
+        if project not in self._results or self._pending.get(project):
+            return
+        result = self._results.pop(project)
+        self.crawler.get_log_cache().save()
+        if result is None:
+            return
+        if result.get("crawl_builds") is not None and not self._failed.get(project):
+            crawl_state = self.crawler.get_crawl_state()
+            crawl_state.update(project, result["crawl_builds"])
+            crawl_state.save()
+        self.crawler.print_project_result(result)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        project_queue = asyncio.Queue(PROJECT_QUEUE_SIZE)
+        download_queue = asyncio.Queue(DOWNLOAD_QUEUE_SIZE)
+        # 发现阶段也要用浏览器，与提取阶段共用线程池；多留一个线程给它
+        extract_executor = ThreadPoolExecutor(max_workers=self.extract_workers + 1)
+        download_executor = ThreadPoolExecutor(max_workers=self.download_workers)
+        try:
+            extractors = [loop.create_task(self._extract_worker(loop, project_queue, download_queue, extract_executor))
+                          for _ in range(self.extract_workers)]
+            downloaders = [loop.create_task(self._download_worker(loop, download_queue, download_executor))
+                           for _ in range(self.download_workers)]
+            await self._discover(loop, project_queue, extract_executor)
+            await asyncio.gather(*extractors)
+            for _ in downloaders:
+                await download_queue.put(None)
+            await asyncio.gather(*downloaders)
+        finally:
+            await loop.run_in_executor(extract_executor, self.close_drivers)
+            extract_executor.shutdown(wait=True)
+            download_executor.shutdown(wait=True)
+
+    def run(self):
+        # 每次运行重新开始计算重试预算（main() 中也会重置，这里保证直接调用 run_pipeline 时同样生效）
+        self.crawler.RETRY_BUDGET.reset()
+        asyncio.run(self._run())
+        self.stats.report()
+        self.crawler.get_blob_store().report()
+
+
+def run_pipeline(chromedriver_path, workers=1, download_workers=None, backend="selenium",
+                 feed_url=STATUS_FEED_URL, incremental=False, crawler=None):
+    """
+    以流水线方式完成一次完整抓取：workers 为提取阶段的浏览器数量，download_workers 为并发下载数（默认
+    crawler.DOWNLOAD_WORKERS），crawler 见 LogPipeline
+    """
+    LogPipeline(chromedriver_path, workers, download_workers, backend, feed_url, incremental, crawler).run()
@@ -0,0 +1,119 @@
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+# 各类就绪信号的默认等待上限 (秒)，可在调用处覆盖
+READINESS_DEADLINES = {
+    "build_status": 100,   # build-status 元素出现且 shadowRoot 已渲染
+    "stable_count": 30,    # 按钮/项目数量稳定
+    "log_link": 15,        # 点击按钮后出现日志链接
+}
+# 轮询间隔 (秒)
+POLL_INTERVAL = 0.25
+# 数量连续保持不变多久视为稳定 (秒)
+SETTLE_TIME = 1.0
+
+# 在 build-status 的 shadowRoot 内（含嵌套的 shadowRoot）统计匹配 selector 的元素个数
+_DEEP_COUNT_JS = """
+    const selector = arguments[0];
+    const host = document.querySelector('build-status');
+    if (!host || !host.shadowRoot) return -1;
+    let count = 0;
+    const stack = [host.shadowRoot];
+    while (stack.length) {
+        const root = stack.pop();
+        count += root.querySelectorAll(selector).length;
+        root.querySelectorAll('*').forEach(el => { if (el.shadowRoot) stack.push(el.shadowRoot); });
+    }
+    return count;
+"""
+
+# 在 build-status 的 shadowRoot 内（含嵌套的 shadowRoot）查找日志面板中第一个 /log-*.txt 链接；
+# 历史按钮 (paper-button) 自身带的链接不算，否则点击后看到的永远是第一个按钮的链接
+_DEEP_LOG_HREF_JS = """
+    const host = document.querySelector('build-status');
+    if (!host || !host.shadowRoot) return null;
+    const stack = [host.shadowRoot];
+    while (stack.length) {
+        const root = stack.shift();
+        const a = Array.from(root.querySelectorAll('a[href^="/log-"][href$=".txt"]'))
+            .find(el => !el.closest('paper-button'));
+        if (a) return a.getAttribute('href');
+        root.querySelectorAll('*').forEach(el => { if (el.shadowRoot) stack.push(el.shadowRoot); });
+    }
+    return null;
+"""
+
+
+def wait_for_build_status(driver, timeout=None):
+    """等待 build-status 出现且其 shadowRoot 已渲染出内容，超时抛出 TimeoutException"""
+    timeout = READINESS_DEADLINES["build_status"] if timeout is None else timeout
+    WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+        lambda d: d.execute_script("""
+            const host = document.querySelector('build-status');
+            return !!(host && host.shadowRoot && host.shadowRoot.childElementCount > 0);
+        """)
+    )
+
+
+def wait_for_stable_count(driver, selector, timeout=None, settle=SETTLE_TIME):
+    """
+    轮询 build-status 内匹配 selector 的元素数量，数量大于 0 且保持 settle 秒不变即返回；
+    到达 timeout 时返回当前数量（可能为 0，例如项目确实没有构建历史）
+    """
+    timeout = READINESS_DEADLINES["stable_count"] if timeout is None else timeout
+    deadline = time.time() + timeout
+    last_count = None
+    stable_since = time.time()
+    count = 0
+    while True:
+        count = driver.execute_script(_DEEP_COUNT_JS, selector)
+        now = time.time()
+        if count != last_count:
+            last_count = count
+            stable_since = now
+        elif count > 0 and now - stable_since >= settle:
+            return count
+        if now >= deadline:
+            return max(count, 0)
+        time.sleep(POLL_INTERVAL)
+
+
+def wait_for_log_link(driver, previous_href=None, timeout=None):
+    """
+    等待点击按钮后出现与 previous_href 不同的日志链接，返回 href；
+    到期仍未变化或完全没有链接时返回 None：此时面板里通常还是上一个按钮的日志，
+    不能当作本次点击的结果（同一次构建的多个按钮由调用方直接复用已找到的链接，不必点击）
+    """
+    timeout = READINESS_DEADLINES["log_link"] if timeout is None else timeout
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+            lambda d: _changed_log_href(d, previous_href)
+        )
+    except TimeoutException:
+        return None
+
+
+def _changed_log_href(driver, previous_href):
+    href = driver.execute_script(_DEEP_LOG_HREF_JS)
+    if href and href != previous_href:
+        return href
+    return False
+
+
+def wait_for_project_page(driver, timeout=None):
+    """项目页面就绪：build-status 已渲染且构建历史按钮数量稳定，返回按钮数量"""
+    wait_for_build_status(driver, timeout)
+    return wait_for_stable_count(driver, "div.buildHistory paper-button")
+
+
+def wait_for_index_page(driver, timeout=None):
+    """首页就绪：build-status 已渲染且项目状态图标数量稳定，返回图标数量"""
+    wait_for_build_status(driver, timeout)
+    return wait_for_stable_count(driver, "iron-icon")
+
+
+def current_log_href(driver):
+    """返回 build-status 内当前显示的日志链接 href，没有则返回 None"""
+    return driver.execute_script(_DEEP_LOG_HREF_JS)
@@ -0,0 +1,110 @@
+import http.client
+import random
+import socket
+import ssl
+import threading
+import time
+
+from events import emit_event
+from log_downloader import DownloadError
+
+# 视为暂时性故障、值得重试的 HTTP 状态码；其余 4xx（如 403/404）重试也不会成功
+RETRYABLE_STATUS = {0, 408, 425, 429, 500, 502, 503, 504}
+
+
+class RetryBudget:
+    """
+    一次运行内所有重试共享的预算：服务整体故障时，全部请求很快耗尽预算并直接失败，
+    而不是每个请求各自重试到上限
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        """消耗一次重试机会，预算已用完时返回 False"""
+        with self._lock:
+            if self.used >= self.total:
+                return False
+            self.used += 1
+            return True
+
+    def reset(self, total=None):
+        with self._lock:
+            if total is not None:
+                self.total = total
+            self.used = 0
+
+    @property
+    def remaining(self):
+        with self._lock:
+            return max(self.total - self.used, 0)
+
+
+def is_retryable_error(exc):
+    """网络层错误和 RETRYABLE_STATUS 中的状态码可以重试，其余（如 404、本地文件错误）直接失败"""
+    if isinstance(exc, DownloadError):
+        return exc.status in RETRYABLE_STATUS
+    if isinstance(exc, (http.client.HTTPException, ConnectionError, socket.timeout, TimeoutError, ssl.SSLError)):
+        return True
+    # 其余 OSError 中只有网络相关的（如 DNS 解析失败）可以重试，磁盘错误重试也没有意义
+    return isinstance(exc, socket.gaierror)
+
+
+class RetryPolicy:
+    """
+    按错误类型决定是否重试，重试间隔为带完全抖动 (full jitter) 的指数退避：
+    第 n 次重试前等待 random(0, min(max_delay, base_delay * 2**n)) 秒，
+    服务端给出 Retry-After 时至少等待该时长；每次重试都要从共享预算中扣除
+    retryable: 额外视为可重试的异常类型（如页面加载时的 WebDriverException）
+    """
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=30.0, budget=None, retryable=()):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.retryable = tuple(retryable)
+
+    def is_retryable(self, exc):
+        return isinstance(exc, self.retryable) or is_retryable_error(exc)
+
+    def delay(self, attempt, exc=None):
+        """第 attempt 次重试（从 0 开始）前的等待秒数"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.max_delay))
+            except ValueError:
+                pass
+        return delay
+
+    def call(self, func, *args, description="", **kwargs):
+        """
+        调用 func，遇到可重试的错误时退避后重试；不可重试、次数用完或预算耗尽时抛出最后一次的异常
+        """
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not self.is_retryable(e):
+                    print(f"⛔ {description or func.__name__} 遇到不可重试的错误: {str(e)}")
+                    raise
+                if attempt + 1 >= self.max_attempts:
+                    raise
+                if self.budget is not None and not self.budget.take():
+                    print(f"⛔ 本次运行的重试预算已用完，不再重试: {description or func.__name__}")
+                    emit_event("retry_budget_exhausted", target=description or func.__name__,
+                               error=type(e).__name__)
+                    raise
+                delay = self.delay(attempt, e)
+                attempt += 1
+                emit_event("retry", target=description or func.__name__, attempt=attempt,
+                           delay=round(delay, 3), error=type(e).__name__)
+                print(f"🔁 {description or func.__name__} 失败 ({str(e)})，"
+                      f"{delay:.1f} 秒后第 {attempt}/{self.max_attempts - 1} 次重试")
+                time.sleep(delay)
@@ -0,0 +1,132 @@
+import atexit
+import os
+import threading
+
+# 缓冲区达到该大小时立即唤醒后台线程写盘
+FLUSH_BYTES = 256 * 1024
+# 缓冲区中的内容最多停留的秒数
+FLUSH_INTERVAL = 1.0
+# 单个运行日志文件的大小上限，超过后轮转为 .1 / .2 ...
+MAX_BYTES = 50 * 1024 * 1024
+BACKUP_COUNT = 5
+
+
+class RunLogWriter:
+    """
+    由后台线程写盘的运行日志：write 只把文本追加到内存缓冲区，
+    后台线程每 flush_interval 秒、或缓冲区超过 flush_bytes 时批量写入文件；
+    close（以及进程正常退出时的 atexit）会把剩余内容全部写完。
+    文件超过 max_bytes 时轮转为 path.1、path.2 …，最多保留 backup_count 个
+    """
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL, flush_bytes=FLUSH_BYTES,
+                 max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT, encoding="utf-8"):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.encoding = encoding
+
+        self._buffer = []
+        self._buffered = 0
+        self._closed = False
+        self._flush_requested = False
+        self._cond = threading.Condition(threading.Lock())
+        # 已写盘的批次号，flush(wait=True) 用来等待自己之前的内容落盘
+        self._queued_batches = 0
+        self._written_batches = 0
+
+        self._file = open(path, "w", encoding=encoding)
+        self._size = 0
+        self._thread = threading.Thread(target=self._run, name="run-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, text):
+        if not text:
+            return 0
+        with self._cond:
+            if self._closed:
+                return 0
+            self._buffer.append(text)
+            self._buffered += len(text)
+            if self._buffered >= self.flush_bytes:
+                self._cond.notify()
+        return len(text)
+
+    def flush(self, wait=False):
+        """请求后台线程尽快写盘；wait=True 时等到此前写入的内容都已落盘"""
+        with self._cond:
+            if self._closed:
+                return
+            self._flush_requested = True
+            target = self._queued_batches + 1
+            self._cond.notify_all()
+            while wait and self._written_batches < target and not self._closed:
+                self._cond.wait()
+
+    def close(self):
+        """写完缓冲区中的全部内容并关闭文件，可重复调用"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._file.close()
+        try:
+            atexit.unregister(self.close)
+        except Exception:
+            pass
+
+    def _take(self):
+        """取出缓冲区内容（调用方持有锁）"""
+        text = "".join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self._flush_requested = False
+        self._queued_batches += 1
+        return text
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not (self._closed or self._flush_requested or self._buffered >= self.flush_bytes):
+                    self._cond.wait(self.flush_interval)
+                closing = self._closed
+                batch = self._queued_batches + 1
+                text = self._take()
+            if text:
+                self._write(text)
+            with self._cond:
+                self._written_batches = batch
+                self._cond.notify_all()
+            if closing:
+                with self._cond:
+                    if not self._buffer:
+                        return
+
+    def _write(self, text):
+        try:
+            nbytes = len(text.encode(self.encoding, errors="replace"))
+            if self.max_bytes and self._size and self._size + nbytes > self.max_bytes:
+                self._rotate()
+            self._file.write(text)
+            self._file.flush()
+            self._size += nbytes
+        except (OSError, ValueError):
+            # 写日志失败不能影响抓取本身
+            pass
+
+    def _rotate(self):
+        """当前文件改名为 path.1，原有的 path.N 依次后移，再打开新的 path"""
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding=self.encoding)
+        self._size = 0
@@ -0,0 +1,190 @@
+"""
+首页快照存档
+每次运行渲染出的首页 HTML 单独压缩保存为 index_snapshots/index_<时间戳>.html.gz，
+manifest.json 记录每个快照的时间、大小与项目统计，超过保留数量的旧快照自动删除。
+用法:
+    python snapshot_archive.py list
+    python snapshot_archive.py diff [旧快照文件名] [新快照文件名]    默认比较最近两次
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from index_extractor import iter_project_statuses
+
+SNAPSHOT_DIR = "index_snapshots"
+MANIFEST_NAME = "manifest.json"
+# 默认保留最近的快照数量
+DEFAULT_KEEP = 60
+COMPRESS_LEVEL = 6
+
+
+class SnapshotArchive:
+    """
+    首页快照存档，manifest.json 保存为：
+      {"snapshots": [{"file", "taken_at", "size", "compressed_size", "sha256",
+                      "projects", "errors"}, ...]}   从旧到新
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR, keep=DEFAULT_KEEP):
+        self.directory = directory
+        self.keep = keep
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self.snapshots = []
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.snapshots = json.load(f).get("snapshots", [])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 快照清单无法读取，将重新建立: {str(e)}")
+
+    def _write_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"snapshots": self.snapshots}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _unique_name(self, taken_at):
+        base = f"index_{taken_at.strftime('%Y%m%d_%H%M%S')}"
+        names = {s["file"] for s in self.snapshots}
+        name, n = f"{base}.html.gz", 1
+        while name in names or os.path.exists(os.path.join(self.directory, name)):
+            name, n = f"{base}_{n}.html.gz", n + 1
+        return name
+
+    def save(self, html, taken_at=None):
+        """压缩保存一份首页快照并更新清单，返回该快照的清单记录"""
+        taken_at = taken_at or datetime.now()
+        data = html.encode("utf-8")
+        statuses = list(iter_project_statuses(html))
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            name = self._unique_name(taken_at)
+            path = os.path.join(self.directory, name)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as raw:
+                with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=COMPRESS_LEVEL) as gz:
+                    gz.write(data)
+            os.replace(tmp_path, path)
+
+            entry = {
+                "file": name,
+                "taken_at": taken_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "size": len(data),
+                "compressed_size": os.path.getsize(path),
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "projects": len(statuses),
+                "errors": sum(1 for _, status in statuses if status == "error"),
+            }
+            self.snapshots.append(entry)
+            self._prune()
+            self._write_manifest()
+        return entry
+
+    def _prune(self):
+        """删除超出保留数量的最旧快照（调用方持有锁）"""
+        if not self.keep or len(self.snapshots) <= self.keep:
+            return
+        expired = self.snapshots[:-self.keep]
+        self.snapshots = self.snapshots[-self.keep:]
+        for entry in expired:
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except OSError:
+                pass
+        print(f"🧹 已删除 {len(expired)} 个过期首页快照")
+
+    def latest(self, n=1):
+        """最近的 n 条快照记录，从旧到新"""
+        with self._lock:
+            return list(self.snapshots[-n:]) if n else []
+
+    def find(self, name):
+        with self._lock:
+            for entry in self.snapshots:
+                if entry["file"] == name:
+                    return entry
+        return None
+
+    def load(self, entry):
+        """读取快照 HTML，entry 为清单记录或文件名"""
+        name = entry["file"] if isinstance(entry, dict) else entry
+        with gzip.open(os.path.join(self.directory, name), "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def statuses(self, entry):
+        """快照中所有项目的 {项目名: 状态}"""
+        return dict(iter_project_statuses(self.load(entry)))
+
+    def diff(self, old, new):
+        """
+        比较两个快照（清单记录或文件名），返回：
+          {"to_error": [...], "to_success": [...], "added": [...], "removed": [...]}
+        to_error / to_success 为两次都存在但状态发生翻转的项目
+        """
+        return diff_statuses(self.statuses(old), self.statuses(new))
+
+
+def diff_statuses(old, new):
+    """比较两份 {项目名: 状态}，列出状态翻转、新增和消失的项目"""
+    result = {"to_error": [], "to_success": [], "added": [], "removed": []}
+    for name, status in new.items():
+        previous = old.get(name)
+        if previous is None:
+            result["added"].append(name)
+        elif previous != status:
+            if status == "error":
+                result["to_error"].append(name)
+            elif status == "success":
+                result["to_success"].append(name)
+    result["removed"] = [name for name in old if name not in new]
+    for names in result.values():
+        names.sort()
+    return result
+
+
+def print_diff(diff, old_name, new_name):
+    print(f"🔀 快照对比 {old_name} → {new_name}")
+    print(f"  ❌ 新增失败 {len(diff['to_error'])} 个: {', '.join(diff['to_error'])}")
+    print(f"  ✅ 恢复成功 {len(diff['to_success'])} 个: {', '.join(diff['to_success'])}")
+    print(f"  ➕ 新出现 {len(diff['added'])} 个, ➖ 消失 {len(diff['removed'])} 个")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="首页快照存档")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help="快照目录")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("list", help="列出所有快照")
+    diff_parser = sub.add_parser("diff", help="比较两个快照中状态翻转的项目")
+    diff_parser.add_argument("old", nargs="?")
+    diff_parser.add_argument("new", nargs="?")
+    args = parser.parse_args()
+
+    archive = SnapshotArchive(args.dir, keep=0)
+    if args.command == "list":
+        for entry in archive.latest(len(archive.snapshots)):
+            print(f"{entry['file']}  {entry['taken_at']}  {entry['compressed_size'] / 1024:.0f} KB "
+                  f"(原始 {entry['size'] / 1024:.0f} KB)  项目 {entry['projects']}  失败 {entry['errors']}")
+    elif args.command == "diff":
+        if args.old and args.new:
+            old, new = args.old, args.new
+        else:
+            recent = archive.latest(2)
+            if len(recent) < 2:
+                print("⚠️ 快照不足两个，无法比较")
+                return
+            old, new = recent[0]["file"], recent[1]["file"]
+        print_diff(archive.diff(old, new), old, new)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
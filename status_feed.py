@@ -0,0 +1,105 @@
+import http.client
+import json
+from datetime import datetime, timezone
+
+from log_downloader import DownloadError, http_get
+
+# 首页 build-status 组件自身读取的状态数据，与日志位于同一个 bucket
+LOG_BASE_URL = "https://oss-fuzz-build-logs.storage.googleapis.com"
+STATUS_FEED_URL = LOG_BASE_URL + "/status.json"
+
+
+class StatusFeedError(Exception):
+    """状态数据无法获取或格式不符合预期"""
+
+
+def fetch_status_feed(feed_url=STATUS_FEED_URL):
+    """
+    通过普通 HTTP 获取状态 JSON，失败时抛出 StatusFeedError；
+    走日志下载共用的 keep-alive 连接池，状态数据与日志在同一个 bucket，建立的连接随后可直接用于下载
+    """
+    try:
+        _, _, body = http_get(feed_url)
+        return json.loads(body.decode("utf-8"))
+    except (DownloadError, http.client.HTTPException, OSError, ValueError) as e:
+        raise StatusFeedError(f"无法获取状态数据 {feed_url}: {str(e)}") from e
+
+
+def format_timestamp(finish_time):
+    """
+    将 RFC3339 时间 (如 2025-10-12T15:04:12.123456789Z) 转换为页面按钮上的格式
+    "2025/10/12 15:04:12"（本地时区，月/日不补零），无法解析时返回 "unknown_time"
+    """
+    if not finish_time:
+        return "unknown_time"
+    value = finish_time.strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    # fromisoformat 最多只接受 6 位小数
+    if "." in value:
+        head, tail = value.split(".", 1)
+        digits = ""
+        while tail and tail[0].isdigit():
+            digits += tail[0]
+            tail = tail[1:]
+        value = head + "." + digits[:6].ljust(6, "0") + tail
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return "unknown_time"
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    dt = dt.astimezone()
+    return f"{dt.year}/{dt.month}/{dt.day} {dt.strftime('%H:%M:%S')}"
+
+
+def _build_entry(build, log_base_url):
+    build_id = build.get("build_id") or ""
+    success = build.get("success")
+    return {
+        "build_id": build_id,
+        "finish_time": build.get("finish_time") or "",
+        "timestamp": format_timestamp(build.get("finish_time")),
+        # 与页面图标一致：1=成功(icons:done)，0=失败(icons:error)，-1=未知
+        "status": 1 if success is True else 0 if success is False else -1,
+        "log_url": f"{log_base_url}/log-{build_id}.txt" if build_id else None,
+    }
+
+
+def parse_status_feed(data, log_base_url=LOG_BASE_URL):
+    """
+    解析状态 JSON，返回 {项目名: {"name", "history", "last_successful_build"}}
+    history 按时间从新到旧排列，与页面上 Build History 按钮顺序一致
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("projects"), list):
+        raise StatusFeedError("状态数据缺少 projects 列表")
+
+    projects = {}
+    for project in data["projects"]:
+        name = project.get("name")
+        if not name:
+            continue
+        history = [_build_entry(b, log_base_url) for b in project.get("history") or []]
+        history.sort(key=lambda b: b["finish_time"], reverse=True)
+        last_success = project.get("last_successful_build")
+        green = _build_entry(last_success, log_base_url) if last_success else None
+        if green:
+            # 该记录本身不一定带 success 字段，但按定义就是成功构建（对应页面上的绿色按钮）
+            green["status"] = 1
+        projects[name] = {
+            "name": name,
+            "history": history,
+            "last_successful_build": green,
+        }
+    return projects
+
+
+def load_status_feed(feed_url=STATUS_FEED_URL, log_base_url=LOG_BASE_URL):
+    """获取并解析状态数据"""
+    return parse_status_feed(fetch_status_feed(feed_url), log_base_url)
+
+
+def failing_projects(projects):
+    """最近一次构建失败的项目名列表，对应首页上带 icons:error 图标的项目"""
+    return [name for name, info in projects.items()
+            if info["history"] and info["history"][0]["status"] == 0]